@@ -1,25 +1,102 @@
 import os
-import yt_dlp
-import whisper
-import cv2
-import numpy as np
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import Optional, Literal
 import json
-from openai import OpenAI
 from dotenv import load_dotenv
 import base64
 from pathlib import Path
 import uuid
-import pdfkit
 import platform
+import shutil
+import subprocess
 from io import BytesIO
+import importlib
+import re
+import time
+import threading
+from contextlib import asynccontextmanager
+import metrics
+import tracing
+from metrics import stage_timer
+from checkpoints import Checkpoint, INTERRUPTED_STATES, STAGE_ORDER, find_checkpoints
+from profiling import PROFILE_ARTIFACTS, run_profiled
+from scheduler import JobCancelled, JobScheduler
+from retention import RetentionManager, remove_source_video
+from batches import MAX_BATCH_SIZE, BatchRegistry, expand_batch
+from singleflight import SingleFlight, flight_key
+from export import export_path, optimize_image, stream_export
+from search import SearchIndex
+from captions import CAPTION_POLICIES, DEFAULT_CAPTION_POLICY, fetch_caption_transcript
+import estimator
+from transcript_store import write_transcript, load_transcript
+from progressive import ProgressiveTranscriber
+from pipeline import PipelineExecutor, Stage
+from frames import extract_frames_parallel, frame_workers, sample_times
+from transcription import ENGINES, ENGINE_OPTION_KEYS, create_engine, transcribe_with_vad
 
 load_dotenv()
 
-app = FastAPI()
+# Keep Whisper's full raw output (tokens, probabilities) next to the compact transcript
+SAVE_RAW_TRANSCRIPT = os.getenv("SAVE_RAW_TRANSCRIPT", "").lower() in ("1", "true", "yes")
+
+# Accept file:// URLs instead of YouTube links (offline benchmarks and local testing only)
+ALLOW_LOCAL_FILES = os.getenv("ALLOW_LOCAL_FILES", "").lower() in ("1", "true", "yes")
+
+# Resume jobs that were interrupted by a crash or restart when the API starts
+RESUME_INTERRUPTED_JOBS = os.getenv("RESUME_INTERRUPTED_JOBS", "true").lower() in ("1", "true", "yes")
+
+# What happens to a cancelled job's files: "keep" the completed stages so /retry
+# can pick up where the job stopped, or "delete" the whole job directory
+CANCELLED_JOB_ARTIFACTS = os.getenv("CANCELLED_JOB_ARTIFACTS", "keep")
+
+# Probe video metadata in /process and reject or downgrade jobs over the configured limits
+ADMISSION_CHECK = os.getenv("ADMISSION_CHECK", "true").lower() in ("1", "true", "yes")
+
+# Attach identical submissions (same video and options) to the job already doing the work
+SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes")
+
+# Widths /image?width= scales step frames down to, for thumbnails in the frontend
+MIN_THUMBNAIL_WIDTH = 64
+MAX_THUMBNAIL_WIDTH = 1280
+THUMBNAIL_QUALITY = 75
+
+# Import the pipeline's heavy dependencies in the background once the API is up,
+# so the first job does not pay for them (the API itself never needs them)
+PRELOAD_PIPELINE_MODULES = os.getenv("PRELOAD_PIPELINE_MODULES", "true").lower() in ("1", "true", "yes")
+PIPELINE_MODULES = ('cv2', 'yt_dlp', 'openai', 'pdfkit')
+
+# Filled in by the startup thread, reported by /health/ready
+readiness = {"jobs_restored": False, "modules": {}}
+
+def start_up():
+    """Restore jobs and warm up the pipeline without delaying the HTTP server"""
+    batch_registry.load()
+    restore_jobs()
+    retention.start(job_is_busy, job_is_completed, forget_job)
+    readiness["jobs_restored"] = True
+    index_completed_jobs()
+    if PRELOAD_PIPELINE_MODULES:
+        for module in PIPELINE_MODULES:
+            import_start = time.perf_counter()
+            try:
+                importlib.import_module(module)
+                readiness["modules"][module] = round(time.perf_counter() - import_start, 3)
+            except Exception as e:
+                readiness["modules"][module] = f"error: {e}"
+                print(f"Could not import {module}: {e}")
+
+@asynccontextmanager
+async def lifespan(app):
+    job_scheduler.start()
+    threading.Thread(target=start_up, daemon=True, name="startup").start()
+    yield
+    tracing.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS middleware for Streamlit
 app.add_middleware(
@@ -30,128 +107,476 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize OpenAI client
-try:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment variables")
-    client = OpenAI(api_key=api_key)
-except Exception as e:
-    print(f"Error initializing OpenAI client: {e}")
-    raise
+# OpenAI client, created on first use: importing the SDK is a large part of the API's startup time
+api_key = os.getenv("OPENAI_API_KEY")
+if not api_key:
+    print("Error initializing OpenAI client: OPENAI_API_KEY not found in environment variables")
+    raise ValueError("OPENAI_API_KEY not found in environment variables")
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+def openai_client():
+    global _openai_client
+    with _openai_client_lock:
+        if _openai_client is None:
+            from openai import OpenAI
+            _openai_client = OpenAI(api_key=api_key)
+        return _openai_client
 
 # Store processing status
 processing_status = {}
 
+# yt-dlp info extracted by the admission check, reused by the download: job_id -> (info, extracted at)
+probed_info = {}
+# Media URLs in the info expire after a few hours; older info is extracted again
+PROBE_INFO_MAX_AGE = 3600
+
+def take_probed_info(job_id: str):
+    """The info dict admission extracted for a job, if it is still fresh"""
+    info, extracted_at = probed_info.pop(job_id, (None, 0))
+    return info if time.time() - extracted_at < PROBE_INFO_MAX_AGE else None
+
+# Runs queued jobs, MAX_CONCURRENT_JOBS at a time, in SCHEDULING_POLICY order
+job_scheduler = JobScheduler()
+
+# Deletes artifacts nothing needs any more and keeps jobs/ within JOBS_DISK_BUDGET_GB
+retention = RetentionManager()
+
+FINISHED_STATES = ("completed", "error", "cancelled")
+
+# Batches of jobs submitted together through /process-batch
+batch_registry = BatchRegistry()
+
+# Follower jobs mirroring an identical job in progress
+single_flight = SingleFlight()
+
+# Full-text index of completed tutorials for /search
+search_index = SearchIndex()
+
+# Status and progress reported while a pipeline stage runs
+STAGE_STATUS = {
+    'transcribe': ("transcribing", 40),
+    'frame_extraction': ("extracting_frames", 60),
+    'structuring': ("structuring_tutorial", 70),
+    'matching': ("matching_frames", 85),
+}
+
+class TranscriptionOptions(BaseModel):
+    engine: Optional[str] = None
+    model_size: Optional[str] = None
+    threads: Optional[int] = None
+    beam_size: Optional[int] = None
+    compute_type: Optional[str] = None
+    vad: bool = False
+    workers: Optional[int] = None
+    # Transcribe while the video downloads (ignored with vad, which needs the whole file)
+    streaming: bool = False
+
+# Extra instructions added to the structuring prompt for each style
+PROMPT_STYLES = {
+    "detailed": "",
+    "concise": "Keep explanations short: one or two sentences per step.",
+    "beginner": "Write for complete beginners: explain any jargon and include every small action.",
+    "expert": "Write for experienced users: skip the basics and focus on key actions and settings.",
+}
+
+STEP_GRANULARITY = {
+    "auto": "as many as needed based on content",
+    "coarse": "3 to 6 high-level steps",
+    "fine": "many small steps, one action per step",
+}
+
+class TutorialOptions(BaseModel):
+    prompt_style: Literal["detailed", "concise", "beginner", "expert"] = "detailed"
+    step_granularity: Literal["auto", "coarse", "fine"] = "auto"
+    # vision: GPT-4o-mini picks among candidate frames, transcript: frame closest to
+    # the transcript passage that best matches the step, middle: no model call
+    frame_selection: Literal["vision", "transcript", "middle"] = "vision"
+
 class VideoRequest(BaseModel):
     youtube_url: str
+    transcription: TranscriptionOptions = TranscriptionOptions()
+    tutorial: TutorialOptions = TutorialOptions()
+    caption_policy: Optional[str] = None
+    profile: bool = False
+    # Only process this section of the video (seconds in the original video)
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+class BatchRequest(BaseModel):
+    urls: list[str] = []
+    playlist_url: Optional[str] = None
+    transcription: TranscriptionOptions = TranscriptionOptions()
+    tutorial: TutorialOptions = TutorialOptions()
+    caption_policy: Optional[str] = None
+
+class RegenerateRequest(BaseModel):
+    tutorial: TutorialOptions = TutorialOptions()
+    # "structuring" re-runs structuring and matching, "matching" keeps the current steps
+    rerun: Literal["structuring", "matching"] = "structuring"
 
 class YouTubeVideoProcessor:
-    def __init__(self, youtube_url, job_id):
+    def __init__(self, youtube_url, job_id, options=None):
         self.job_id = job_id
         self.youtube_url = youtube_url
+        self.options = options or VideoRequest(youtube_url=youtube_url)
+        self.transcription_options = self.options.transcription
+        self.tutorial_options = self.options.tutorial
+        self.caption_policy = self.options.caption_policy
+        self.caption_transcript = None
+        # Seconds of video processed: the requested section, or the whole video
+        self.video_duration = None
+        self.has_range = self.options.start is not None or self.options.end is not None
+        self.range_start = self.options.start or 0.0
+        self.range_end = self.options.end
+        self.progressive = None
         self.job_dir = f"jobs/{job_id}"
+        self.transcript_path = f'{self.job_dir}/transcript.bin'
         os.makedirs(f'{self.job_dir}/frames', exist_ok=True)
         os.makedirs(f'{self.job_dir}/output', exist_ok=True)
+        self.checkpoint = Checkpoint(self.job_dir)
+        self.structure_is_fallback = False
+        # Jobs of a batch share one LLM request budget
+        self.llm_limiter = batch_registry.limiter_for_job(job_id)
+
+    def _check_cancelled(self):
+        job_scheduler.check_cancelled(self.job_id)
+
+    def _should_stop(self):
+        return job_scheduler.is_cancelled(self.job_id)
+
+    def _wait_for_llm_slot(self):
+        if self.llm_limiter:
+            with tracing.span("llm_slot_wait"):
+                self.llm_limiter.acquire()
+
+    def _download_progress(self, progress):
+        # yt-dlp calls this for every downloaded chunk
+        self._check_cancelled()
+        total = progress.get('total_bytes') or progress.get('total_bytes_estimate')
+        if self.progressive is not None and progress['status'] == 'downloading' and total:
+            fraction = progress['downloaded_bytes'] / total
+            self.progressive.update(progress['tmpfilename'], fraction)
+            processing_status[self.job_id] = {
+                "status": "downloading",
+                "progress": int(fraction * 20),
+                "transcribed_seconds": self.progressive.transcribed_until,
+            }
+
+    def _start_progressive_transcription(self):
+        """Transcribe windows of the video as the download progresses"""
+        self.engine_options = self.transcription_options.model_dump(include=set(ENGINE_OPTION_KEYS))
+        self.transcription_engine = create_engine(**self.engine_options)
+        
+        def load_model():
+            with stage_timer(self.job_id, 'model_load'):
+                self.transcription_engine.load()
         
-        processing_status[job_id] = {"status": "downloading", "progress": 0}
-        self.video_path = self._download_video(youtube_url)
+        def transcribe_window(audio):
+            with stage_timer(self.job_id, 'transcribe'):
+                return self.transcription_engine.transcribe(audio, should_stop=self._should_stop)
+        
+        self.progressive = ProgressiveTranscriber(transcribe_window, self.video_duration,
+                                                  should_stop=self._should_stop, on_start=load_model)
+        self.progressive.start()
+
+    def prepare(self):
+        """Download the video and load the transcription model"""
+        job_id = self.job_id
+        self._check_cancelled()
+        download = self.checkpoint.get('download')
+        # The video may have been deleted by the retention policy once transcript and frames existed
+        video_needed = not (self.checkpoint.is_done('transcribe') and self.checkpoint.is_done('frame_extraction'))
+        if download and (os.path.exists(download['video_path']) or not video_needed):
+            self.video_path = download['video_path']
+            self.yt_title = download['title']
+            self.video_duration = download.get('duration')
+        else:
+            processing_status[job_id] = {"status": "downloading", "progress": 0}
+            with stage_timer(job_id, 'download'):
+                self.video_path = self._download_video(self.youtube_url)
+            metrics.record_bytes('download', self.video_path)
+            self.checkpoint.complete('download', video_path=self.video_path, title=self.yt_title,
+                                     duration=self.video_duration)
         
+        self._check_cancelled()
+        if self.progressive is not None:
+            # The model was loaded by the progressive transcriber
+            return
         processing_status[job_id] = {"status": "loading_model", "progress": 20}
-        self.whisper_model = whisper.load_model("base")
+        self.engine_options = self.transcription_options.model_dump(include=set(ENGINE_OPTION_KEYS))
+        self.transcription_engine = create_engine(**self.engine_options)
+        needs_model = not (self.transcription_options.vad or self.caption_transcript or os.path.exists(self.transcript_path))
+        if needs_model:
+            # VAD mode loads the model inside each pool worker instead
+            with stage_timer(job_id, 'model_load'):
+                self.transcription_engine.load()
+
+    def _resolve_range(self, full_duration):
+        """Clamp the requested section to the video and set the processed duration"""
+        if full_duration:
+            self.range_end = min(self.range_end or full_duration, full_duration)
+        self.video_duration = self.range_end - self.range_start if self.range_end else None
+
+    def _in_range(self, segments):
+        return [seg for seg in segments if seg['end'] > self.range_start and (self.range_end is None or seg['start'] < self.range_end)]
 
     def _download_video(self, video_url):
+        if video_url.startswith("file://"):
+            return self._copy_local_video(video_url[len("file://"):])
+        
+        import yt_dlp
+        
         ydl_opts = {
             'format': 'best',
             'outtmpl': f'{self.job_dir}/downloaded_video.%(ext)s',
             'quiet': True,
+            'progress_hooks': [self._download_progress],
         }
+        if self.has_range:
+            # Download only the section; cutting at exact times keeps clip time + start == original time
+            end = self.range_end if self.range_end is not None else float('inf')
+            ydl_opts['download_ranges'] = yt_dlp.utils.download_range_func(None, [(self.range_start, end)])
+            ydl_opts['force_keyframes_at_cuts'] = True
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             try:
-                info_dict = ydl.extract_info(video_url, download=False)
+                # Reuse the admission check's extraction rather than asking YouTube again
+                info_dict = take_probed_info(self.job_id) or ydl.extract_info(video_url, download=False)
                 video_title = info_dict.get('title', 'Unknown Title')
                 video_extension = info_dict.get('ext', 'mp4')
                 output_file_path = f"{self.job_dir}/downloaded_video.{video_extension}"
 
                 self.yt_title = video_title
+                self._resolve_range(info_dict.get('duration'))
                 video_path = os.path.abspath(output_file_path)
                 
+                self.caption_transcript = fetch_caption_transcript(ydl, info_dict, self.caption_policy)
+                if self.caption_transcript and self.has_range:
+                    # Captions cover the whole video and are already in original video time
+                    segments = self._in_range(self.caption_transcript['segments'])
+                    self.caption_transcript = {**self.caption_transcript, 'segments': segments,
+                                               'text': "".join(seg['text'] for seg in segments)}
+                if self.caption_transcript:
+                    print(f"Using {self.caption_transcript['source']} instead of Whisper for job {self.job_id}")
+                    # Captions are the transcript: persist them now so a resumed job keeps them
+                    write_transcript(self.transcript_path, self.caption_transcript)
+                
+                options = self.transcription_options
+                streaming = (options.streaming and not options.vad and not self.caption_transcript
+                             and self.video_duration and not os.path.exists(self.transcript_path))
                 if not os.path.exists(video_path):
-                    ydl.download([video_url])
+                    if streaming:
+                        self._start_progressive_transcription()
+                    # Downloads from the info already extracted (as ydl.download_with_info_file does)
+                    ydl.process_ie_result(ydl.sanitize_info(info_dict, remove_private_keys=True), download=True)
+                    if self.progressive is not None:
+                        self.progressive.finish(video_path)
                 
                 return video_path
             except Exception as e:
+                if self.progressive is not None:
+                    self.progressive.abort()
+                # yt-dlp may wrap the JobCancelled raised in the progress hook
+                self._check_cancelled()
                 processing_status[self.job_id] = {"status": "error", "message": str(e)}
                 raise Exception(f"Error downloading video: {str(e)}")
 
-    def extract_text_and_frames(self, frame_interval=10):
-        transcription_file_path = f'{self.job_dir}/transcription_result.json'
-
-        if os.path.exists(transcription_file_path):
-            with open(transcription_file_path, 'r', encoding='utf-8') as f:
-                result = json.load(f)
-        else:
-            processing_status[self.job_id] = {"status": "transcribing", "progress": 40}
-            result = self.whisper_model.transcribe(self.video_path)
-            with open(transcription_file_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=4)
-
-        # Extract ALL frames at intervals
-        processing_status[self.job_id] = {"status": "extracting_frames", "progress": 60}
-        all_frames = self._extract_all_frames(frame_interval)
-        
-        # Get full transcript
-        full_transcript = " ".join([seg['text'] for seg in result['segments']])
+    def _copy_local_video(self, source_path):
+        """Use a local video file in place of a YouTube download"""
+        if not ALLOW_LOCAL_FILES:
+            processing_status[self.job_id] = {"status": "error", "message": "Local files are not allowed"}
+            raise Exception("Error downloading video: local files are not allowed (set ALLOW_LOCAL_FILES=1)")
+        if not os.path.exists(source_path):
+            processing_status[self.job_id] = {"status": "error", "message": "Local file not found"}
+            raise Exception(f"Error downloading video: {source_path} not found")
         
-        # Use GPT to structure the tutorial
-        processing_status[self.job_id] = {"status": "structuring_tutorial", "progress": 70}
-        tutorial_structure = self._structure_tutorial_with_gpt(full_transcript)
+        self.yt_title = Path(source_path).stem
+        self._resolve_range(estimator.probe_video(f"file://{source_path}")['duration'])
+        video_path = os.path.abspath(f"{self.job_dir}/downloaded_video{Path(source_path).suffix}")
+        if not os.path.exists(video_path):
+            if self.has_range:
+                subprocess.run([
+                    'ffmpeg', '-y', '-nostdin', '-loglevel', 'error',
+                    '-ss', f'{self.range_start:.3f}', '-i', source_path, '-t', f'{self.video_duration:.3f}',
+                    '-c:v', 'libx264', '-preset', 'veryfast', '-c:a', 'aac', video_path,
+                ], check=True)
+            else:
+                shutil.copyfile(source_path, video_path)
+        return video_path
+
+    def extract_text_and_frames(self, frame_interval=10):
+        """Run the stage graph: transcription and frame extraction in parallel, then structuring and matching"""
+        stages = [
+            Stage('transcribe', self._transcribe_stage, inputs=('video',), outputs=('transcript',)),
+            Stage('frame_extraction', lambda video: self._frame_stage(frame_interval),
+                  inputs=('video',), outputs=('frames',)),
+            Stage('release_video', self._release_video_stage, inputs=('transcript', 'frames')),
+            Stage('structuring', self._structuring_stage, inputs=('transcript',), outputs=('structure',), pool='io'),
+            Stage('matching', self._matching_stage, inputs=('structure', 'frames', 'transcript'),
+                  outputs=('tutorial',), pool='io'),
+        ]
+        executor = PipelineExecutor(stages, on_stage_start=self._stage_started, inline=self.options.profile)
+        artifacts = executor.run({'video': self.video_path})
         
-        # Match frames to steps using GPT-4o-mini
-        processing_status[self.job_id] = {"status": "matching_frames", "progress": 85}
-        tutorial_with_frames = self._match_frames_to_steps(tutorial_structure, all_frames, result['segments'])
+        critical_path = executor.critical_path('tutorial')
+        metrics.record_critical_path(self.job_id, critical_path)
+        print(f"Critical path for job {self.job_id}: {' -> '.join(step['stage'] for step in critical_path)}")
         
         processing_status[self.job_id] = {"status": "completed", "progress": 100}
+        return artifacts['tutorial']
+
+    def _stage_started(self, stage, running):
+        self._check_cancelled()
+        # Report the most advanced of the stages running at the moment
+        status, progress = max((STAGE_STATUS[name] for name in running if name in STAGE_STATUS),
+                               key=lambda item: item[1], default=STAGE_STATUS['transcribe'])
+        processing_status[self.job_id] = {"status": status, "progress": progress, "running_stages": running}
+
+    def _transcribe_stage(self, video_path):
+        if not os.path.exists(self.transcript_path):
+            if self.progressive is not None:
+                # Most windows were transcribed during the download, wait for the rest
+                result = self.progressive.result()
+            else:
+                with stage_timer(self.job_id, 'transcribe'):
+                    if self.transcription_options.vad:
+                        result = transcribe_with_vad(video_path, self.engine_options, self.transcription_options.workers,
+                                                     should_stop=self._should_stop,
+                                                     report_cpu=lambda cpu: metrics.add_worker_cpu(self.job_id, 'transcribe', cpu))
+                    else:
+                        result = self.transcription_engine.transcribe(video_path, should_stop=self._should_stop)
+            # A cancelled transcription is incomplete and must not be cached
+            self._check_cancelled()
+            if self.range_start:
+                # The clip starts at range_start: store original video times
+                result['segments'] = [
+                    {**seg, 'start': seg['start'] + self.range_start, 'end': seg['end'] + self.range_start}
+                    for seg in result['segments']
+                ]
+            
+            write_transcript(self.transcript_path, result)
+            metrics.record_bytes('transcribe', self.transcript_path)
+            if SAVE_RAW_TRANSCRIPT:
+                with open(f'{self.job_dir}/transcription_result.json', 'w', encoding='utf-8') as f:
+                    json.dump(result, f, ensure_ascii=False, indent=4)
+        if not self.checkpoint.is_done('transcribe'):
+            self.checkpoint.complete('transcribe', transcript_path=self.transcript_path)
+        
+        return load_transcript(self.transcript_path)
+
+    def _frame_stage(self, frame_interval):
+        """Extract ALL frames at intervals"""
+        if self.checkpoint.is_done('frame_extraction'):
+            return self._load_frames(self.checkpoint.get('frame_extraction')['frames'])
+        with stage_timer(self.job_id, 'frame_extraction'):
+            all_frames = self._extract_all_frames(frame_interval)
+        self.checkpoint.complete('frame_extraction', frames=[
+            {'timestamp': frame['timestamp'], 'path': frame['path']} for frame in all_frames
+        ])
+        return all_frames
+
+    def _release_video_stage(self, transcript, frames):
+        # Transcript and frames are all the later stages need from the video
+        remove_source_video(self.video_path)
+
+    def _structuring_stage(self, transcript):
+        """Use GPT to structure the tutorial"""
+        if self.checkpoint.is_done('structuring'):
+            return self.checkpoint.get('structuring')['structure']
+        with stage_timer(self.job_id, 'structuring'):
+            tutorial_structure = self._structure_tutorial_with_gpt(transcript.full_text())
+        # A fallback structure (API failure) is not checkpointed, so a retry asks GPT again
+        if not self.structure_is_fallback:
+            self.checkpoint.complete('structuring', structure=tutorial_structure)
+        return tutorial_structure
+
+    def _matching_stage(self, tutorial_structure, all_frames, transcript):
+        """Match frames to steps using GPT-4o-mini"""
+        tutorial_path = f'{self.job_dir}/output/tutorial.json'
+        if self.checkpoint.is_done('matching'):
+            with open(tutorial_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        with stage_timer(self.job_id, 'matching'):
+            tutorial_with_frames = self._match_frames_to_steps(tutorial_structure, all_frames, transcript)
+        with open(tutorial_path, 'w', encoding='utf-8') as f:
+            json.dump(tutorial_with_frames, f, ensure_ascii=False)
+        if not self.structure_is_fallback:
+            self.checkpoint.complete('matching', tutorial_path=tutorial_path)
         return tutorial_with_frames
 
+    def _load_frames(self, frames):
+        """Rebuild frame data (with base64 for GPT) from checkpointed frame files"""
+        frames_data = []
+        for frame in frames:
+            with open(frame['path'], 'rb') as f:
+                frame_base64 = base64.b64encode(f.read()).decode('utf-8')
+            frames_data.append({**frame, 'base64': frame_base64})
+        return frames_data
+
     def _extract_all_frames(self, interval):
         """Extract frames at regular intervals"""
-        video = cv2.VideoCapture(self.video_path)
-        fps = video.get(cv2.CAP_PROP_FPS)
-        duration = video.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+        times = sample_times(self.video_path, interval)
+        workers = frame_workers(len(times), job_scheduler.running_jobs())
+        if workers > 1:
+            frames_data = []
+            report_cpu = lambda cpu: metrics.add_worker_cpu(self.job_id, 'frame_extraction', cpu)
+            for timestamp, frame_path, jpeg in extract_frames_parallel(self.video_path, times, f'{self.job_dir}/frames',
+                                                                       self.range_start, workers, self._should_stop,
+                                                                       report_cpu):
+                metrics.FRAMES_EXTRACTED.inc()
+                metrics.BYTES_PROCESSED.labels('frame_extraction').inc(len(jpeg))
+                frames_data.append({
+                    'timestamp': timestamp,
+                    'path': frame_path,
+                    'base64': base64.b64encode(jpeg).decode('utf-8')
+                })
+            self._check_cancelled()
+            return frames_data
+        
+        import cv2
         
+        video = cv2.VideoCapture(self.video_path)
         frames_data = []
-        for t in np.arange(0, duration, interval):
+        for t in times:
+            if self._should_stop():
+                break
             video.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
             ret, frame = video.read()
             if ret:
-                frame_path = f'{self.job_dir}/frames/frame_{t:.2f}.jpg'
-                cv2.imwrite(frame_path, frame)
-                
-                # Encode frame to base64 for GPT-4o-mini
+                # Frames are named and timestamped by their position in the original video
+                timestamp = t + self.range_start
+                frame_path = f'{self.job_dir}/frames/frame_{timestamp:.2f}.jpg'
+                # Encode once, write the same JPEG bytes to disk and to base64 for GPT-4o-mini
                 _, buffer = cv2.imencode('.jpg', frame)
+                with open(frame_path, 'wb') as f:
+                    f.write(buffer.tobytes())
                 frame_base64 = base64.b64encode(buffer).decode('utf-8')
+                metrics.FRAMES_EXTRACTED.inc()
+                metrics.BYTES_PROCESSED.labels('frame_extraction').inc(len(buffer))
                 
                 frames_data.append({
-                    'timestamp': t,
+                    'timestamp': timestamp,
                     'path': frame_path,
                     'base64': frame_base64
                 })
         
         video.release()
+        self._check_cancelled()
         return frames_data
 
     def _structure_tutorial_with_gpt(self, transcript):
         """Use GPT to structure the transcript into tutorial format"""
+        style = PROMPT_STYLES[self.tutorial_options.prompt_style]
+        style_instruction = f"   - {style}\n" if style else ""
         prompt = f"""You are a tutorial creator. Convert the following video transcript into a well-structured tutorial format.
 
 Structure it as:
 1. Introduction (brief overview)
-2. Multiple steps (as many as needed based on content)
+2. Multiple steps ({STEP_GRANULARITY[self.tutorial_options.step_granularity]})
    - Each step should have a title and detailed explanation
    - Steps should be logical and sequential
-
+{style_instruction}
 Transcript:
 {transcript}
 
@@ -166,19 +591,25 @@ Return ONLY a JSON object with this structure:
 }}"""
 
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a tutorial structuring expert. Always respond with valid JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
+            self._wait_for_llm_slot()
+            request_start = time.perf_counter()
+            with tracing.span("openai.chat.completions", purpose="structuring", model="gpt-4o-mini"):
+                response = openai_client().chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": "You are a tutorial structuring expert. Always respond with valid JSON only."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    response_format={"type": "json_object"}
+                )
+                metrics.record_llm_call('structuring', time.perf_counter() - request_start, response, self.job_id)
             
             return json.loads(response.choices[0].message.content)
         except Exception as e:
+            metrics.LLM_ERRORS.labels('structuring').inc()
             print(f"Error structuring tutorial: {e}")
+            self.structure_is_fallback = True
             return {
                 "title": "Video Tutorial",
                 "introduction": transcript[:500],
@@ -186,10 +617,11 @@ Return ONLY a JSON object with this structure:
             }
 
     def _match_frames_to_steps(self, tutorial_structure, frames_data, segments):
-        """Use GPT-4o-mini vision to select best frame for each step"""
+        """Select the best frame for each step (GPT-4o-mini vision by default)"""
         steps_with_frames = []
         
         for step in tutorial_structure['steps']:
+            self._check_cancelled()
             # Select 5-8 candidate frames (evenly distributed)
             num_candidates = min(8, len(frames_data))
             step_index = step['step_number'] - 1
@@ -203,8 +635,14 @@ Return ONLY a JSON object with this structure:
             if not candidate_frames:
                 candidate_frames = frames_data[:1]
             
-            # Use GPT-4o-mini vision to select best frame
-            best_frame = self._select_best_frame_with_gpt(step, candidate_frames)
+            frame_selection = self.tutorial_options.frame_selection
+            if frame_selection == "vision":
+                # Use GPT-4o-mini vision to select best frame
+                best_frame = self._select_best_frame_with_gpt(step, candidate_frames)
+            elif frame_selection == "transcript":
+                best_frame = self._select_frame_by_transcript(step, candidate_frames, segments)
+            else:
+                best_frame = candidate_frames[len(candidate_frames) // 2]
             
             steps_with_frames.append({
                 **step,
@@ -217,6 +655,23 @@ Return ONLY a JSON object with this structure:
             'steps': steps_with_frames
         }
 
+    def _select_frame_by_transcript(self, step, candidate_frames, transcript):
+        """Pick the candidate closest to the transcript segment that best matches the step text"""
+        step_words = set(f"{step['title']} {step['explanation']}".lower().split())
+        window_start = candidate_frames[0]['timestamp']
+        window_end = candidate_frames[-1]['timestamp'] + 1
+        
+        best_time, best_overlap = None, 0
+        for idx in transcript.between(window_start, window_end):
+            overlap = len(step_words & set(transcript.text_at(idx).lower().split()))
+            if overlap > best_overlap:
+                best_time = (transcript.starts[idx] + transcript.ends[idx]) / 2
+                best_overlap = overlap
+        
+        if best_time is None:
+            return candidate_frames[len(candidate_frames) // 2]
+        return min(candidate_frames, key=lambda frame: abs(frame['timestamp'] - best_time))
+
     def _select_best_frame_with_gpt(self, step, candidate_frames):
         """Use GPT-4o-mini vision to select the most relevant frame"""
         if len(candidate_frames) == 1:
@@ -249,14 +704,19 @@ Respond with ONLY the frame number (1-{len(candidate_frames)}) that best matches
             })
         
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "user", "content": content}
-                ],
-                max_tokens=10,
-                temperature=0.3
-            )
+            self._wait_for_llm_slot()
+            request_start = time.perf_counter()
+            with tracing.span("openai.chat.completions", purpose="frame_selection", model="gpt-4o-mini",
+                              candidate_frames=len(candidate_frames)):
+                response = openai_client().chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "user", "content": content}
+                    ],
+                    max_tokens=10,
+                    temperature=0.3
+                )
+                metrics.record_llm_call('frame_selection', time.perf_counter() - request_start, response, self.job_id)
             
             # Extract frame number from response
             response_text = response.choices[0].message.content.strip()
@@ -265,233 +725,14 @@ Respond with ONLY the frame number (1-{len(candidate_frames)}) that best matches
             
             return candidate_frames[frame_num - 1]
         except Exception as e:
+            metrics.LLM_ERRORS.labels('frame_selection').inc()
             print(f"Error selecting frame with GPT: {e}")
             # Return middle frame as fallback
             return candidate_frames[len(candidate_frames) // 2]
 
     def generate_html(self, tutorial_data):
         """Generate HTML tutorial"""
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{tutorial_data['title']}</title>
-            <style>
-                :root {{
-                    --bg-color: #f5f5f5;
-                    --card-bg: white;
-                    --text-color: #333;
-                    --text-secondary: #555;
-                    --shadow: rgba(0,0,0,0.1);
-                    --timestamp-bg: #f0f0f0;
-                    --timestamp-color: #666;
-                }}
-                
-                [data-theme="dark"] {{
-                    --bg-color: #1a1a1a;
-                    --card-bg: #2d2d2d;
-                    --text-color: #e0e0e0;
-                    --text-secondary: #b0b0b0;
-                    --shadow: rgba(0,0,0,0.3);
-                    --timestamp-bg: #3d3d3d;
-                    --timestamp-color: #a0a0a0;
-                }}
-                
-                * {{
-                    transition: background-color 0.3s ease, color 0.3s ease;
-                }}
-                
-                body {{
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                    max-width: 900px;
-                    margin: 0 auto;
-                    padding: 40px 20px;
-                    background-color: var(--bg-color);
-                    line-height: 1.6;
-                    color: var(--text-color);
-                }}
-                
-                .theme-toggle {{
-                    position: fixed;
-                    top: 20px;
-                    right: 20px;
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    border: none;
-                    padding: 12px 20px;
-                    border-radius: 25px;
-                    cursor: pointer;
-                    font-size: 1em;
-                    font-weight: bold;
-                    box-shadow: 0 4px 6px var(--shadow);
-                    z-index: 1000;
-                }}
-                
-                .theme-toggle:hover {{
-                    transform: scale(1.05);
-                }}
-                
-                .header {{
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    padding: 40px;
-                    border-radius: 10px;
-                    margin-bottom: 30px;
-                    box-shadow: 0 4px 6px var(--shadow);
-                }}
-                
-                .header h1 {{
-                    margin: 0 0 10px 0;
-                    font-size: 2.5em;
-                }}
-                
-                .intro {{
-                    background: var(--card-bg);
-                    padding: 30px;
-                    border-radius: 10px;
-                    margin-bottom: 30px;
-                    box-shadow: 0 2px 4px var(--shadow);
-                }}
-                
-                .intro h2 {{
-                    color: #667eea;
-                    margin-top: 0;
-                }}
-                
-                .step {{
-                    background: var(--card-bg);
-                    padding: 30px;
-                    border-radius: 10px;
-                    margin-bottom: 30px;
-                    box-shadow: 0 2px 4px var(--shadow);
-                }}
-                
-                .step-header {{
-                    display: flex;
-                    align-items: center;
-                    margin-bottom: 20px;
-                }}
-                
-                .step-number {{
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    width: 50px;
-                    height: 50px;
-                    border-radius: 50%;
-                    display: flex;
-                    align-items: center;
-                    justify-content: center;
-                    font-size: 1.5em;
-                    font-weight: bold;
-                    margin-right: 20px;
-                    flex-shrink: 0;
-                }}
-                
-                .step-title {{
-                    font-size: 1.8em;
-                    color: var(--text-color);
-                    margin: 0;
-                }}
-                
-                .step-explanation {{
-                    color: var(--text-secondary);
-                    margin-bottom: 20px;
-                    font-size: 1.1em;
-                }}
-                
-                .step-image {{
-                    width: 100%;
-                    border-radius: 8px;
-                    box-shadow: 0 4px 8px var(--shadow);
-                    margin-top: 20px;
-                }}
-                
-                .timestamp {{
-                    display: inline-block;
-                    background: var(--timestamp-bg);
-                    padding: 5px 15px;
-                    border-radius: 20px;
-                    font-size: 0.9em;
-                    color: var(--timestamp-color);
-                    margin-top: 10px;
-                }}
-                
-                .timestamp a {{
-                    color: #667eea;
-                    text-decoration: none;
-                    margin-left: 10px;
-                }}
-                
-                .timestamp a:hover {{
-                    text-decoration: underline;
-                }}
-                
-                .video-link {{
-                    color: white;
-                    text-decoration: none;
-                    display: inline-block;
-                    margin-top: 10px;
-                    padding: 10px 20px;
-                    background: rgba(255,255,255,0.2);
-                    border-radius: 5px;
-                    transition: background 0.3s;
-                }}
-                
-                .video-link:hover {{
-                    background: rgba(255,255,255,0.3);
-                }}
-            </style>
-        </head>
-        <body>
-            <button class="theme-toggle" onclick="toggleTheme()">🌓 Toggle Theme</button>
-            
-            <div class="header">
-                <h1>{tutorial_data['title']}</h1>
-                <a href="{self.youtube_url}" class="video-link" target="_blank">🎥 Watch Original Video</a>
-            </div>
-            
-            <div class="intro">
-                <h2>📖 Introduction</h2>
-                <p>{tutorial_data['introduction']}</p>
-            </div>
-        """
-        
-        for step in tutorial_data['steps']:
-            html_content += f"""
-            <div class="step">
-                <div class="step-header">
-                    <div class="step-number">{step['step_number']}</div>
-                    <h2 class="step-title">{step['title']}</h2>
-                </div>
-                <div class="step-explanation">
-                    {step['explanation']}
-                </div>
-                <img src="file:///{os.path.abspath(step['frame'])}" alt="Step {step['step_number']}" class="step-image">
-                <div class="timestamp">
-                    ⏱️ Timestamp: {step['timestamp']:.2f}s 
-                    <a href="{self.youtube_url}&t={int(step['timestamp'])}s" target="_blank">Jump to video</a>
-                </div>
-            </div>
-            """
-        
-        html_content += """
-            <script>
-                // Check for saved theme preference or default to light mode
-                const currentTheme = localStorage.getItem('theme') || 'light';
-                document.documentElement.setAttribute('data-theme', currentTheme);
-                
-                function toggleTheme() {
-                    const theme = document.documentElement.getAttribute('data-theme');
-                    const newTheme = theme === 'light' ? 'dark' : 'light';
-                    document.documentElement.setAttribute('data-theme', newTheme);
-                    localStorage.setItem('theme', newTheme);
-                }
-            </script>
-        </body>
-        </html>
-        """
+        html_content = render_tutorial_html(self.youtube_url, tutorial_data, lambda path: f"file:///{os.path.abspath(path)}")
         
         output_path = f'{self.job_dir}/output/tutorial.html'
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -499,25 +740,515 @@ Respond with ONLY the frame number (1-{len(candidate_frames)}) that best matches
         
         return output_path
 
+def render_tutorial_html(youtube_url, tutorial_data, image_src):
+    """Tutorial HTML for a video, with ``image_src(frame_path)`` as each step image's URL"""
+    html_content = f"""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>{tutorial_data['title']}</title>
+        <style>
+            :root {{
+                --bg-color: #f5f5f5;
+                --card-bg: white;
+                --text-color: #333;
+                --text-secondary: #555;
+                --shadow: rgba(0,0,0,0.1);
+                --timestamp-bg: #f0f0f0;
+                --timestamp-color: #666;
+            }}
+            
+            [data-theme="dark"] {{
+                --bg-color: #1a1a1a;
+                --card-bg: #2d2d2d;
+                --text-color: #e0e0e0;
+                --text-secondary: #b0b0b0;
+                --shadow: rgba(0,0,0,0.3);
+                --timestamp-bg: #3d3d3d;
+                --timestamp-color: #a0a0a0;
+            }}
+            
+            * {{
+                transition: background-color 0.3s ease, color 0.3s ease;
+            }}
+            
+            body {{
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                max-width: 900px;
+                margin: 0 auto;
+                padding: 40px 20px;
+                background-color: var(--bg-color);
+                line-height: 1.6;
+                color: var(--text-color);
+            }}
+            
+            .theme-toggle {{
+                position: fixed;
+                top: 20px;
+                right: 20px;
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                border: none;
+                padding: 12px 20px;
+                border-radius: 25px;
+                cursor: pointer;
+                font-size: 1em;
+                font-weight: bold;
+                box-shadow: 0 4px 6px var(--shadow);
+                z-index: 1000;
+            }}
+            
+            .theme-toggle:hover {{
+                transform: scale(1.05);
+            }}
+            
+            .header {{
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 40px;
+                border-radius: 10px;
+                margin-bottom: 30px;
+                box-shadow: 0 4px 6px var(--shadow);
+            }}
+            
+            .header h1 {{
+                margin: 0 0 10px 0;
+                font-size: 2.5em;
+            }}
+            
+            .intro {{
+                background: var(--card-bg);
+                padding: 30px;
+                border-radius: 10px;
+                margin-bottom: 30px;
+                box-shadow: 0 2px 4px var(--shadow);
+            }}
+            
+            .intro h2 {{
+                color: #667eea;
+                margin-top: 0;
+            }}
+            
+            .step {{
+                background: var(--card-bg);
+                padding: 30px;
+                border-radius: 10px;
+                margin-bottom: 30px;
+                box-shadow: 0 2px 4px var(--shadow);
+            }}
+            
+            .step-header {{
+                display: flex;
+                align-items: center;
+                margin-bottom: 20px;
+            }}
+            
+            .step-number {{
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                width: 50px;
+                height: 50px;
+                border-radius: 50%;
+                display: flex;
+                align-items: center;
+                justify-content: center;
+                font-size: 1.5em;
+                font-weight: bold;
+                margin-right: 20px;
+                flex-shrink: 0;
+            }}
+            
+            .step-title {{
+                font-size: 1.8em;
+                color: var(--text-color);
+                margin: 0;
+            }}
+            
+            .step-explanation {{
+                color: var(--text-secondary);
+                margin-bottom: 20px;
+                font-size: 1.1em;
+            }}
+            
+            .step-image {{
+                width: 100%;
+                border-radius: 8px;
+                box-shadow: 0 4px 8px var(--shadow);
+                margin-top: 20px;
+            }}
+            
+            .timestamp {{
+                display: inline-block;
+                background: var(--timestamp-bg);
+                padding: 5px 15px;
+                border-radius: 20px;
+                font-size: 0.9em;
+                color: var(--timestamp-color);
+                margin-top: 10px;
+            }}
+            
+            .timestamp a {{
+                color: #667eea;
+                text-decoration: none;
+                margin-left: 10px;
+            }}
+            
+            .timestamp a:hover {{
+                text-decoration: underline;
+            }}
+            
+            .video-link {{
+                color: white;
+                text-decoration: none;
+                display: inline-block;
+                margin-top: 10px;
+                padding: 10px 20px;
+                background: rgba(255,255,255,0.2);
+                border-radius: 5px;
+                transition: background 0.3s;
+            }}
+            
+            .video-link:hover {{
+                background: rgba(255,255,255,0.3);
+            }}
+        </style>
+    </head>
+    <body>
+        <button class="theme-toggle" onclick="toggleTheme()">🌓 Toggle Theme</button>
+        
+        <div class="header">
+            <h1>{tutorial_data['title']}</h1>
+            <a href="{youtube_url}" class="video-link" target="_blank">🎥 Watch Original Video</a>
+        </div>
+        
+        <div class="intro">
+            <h2>📖 Introduction</h2>
+            <p>{tutorial_data['introduction']}</p>
+        </div>
+    """
+    
+    for step in tutorial_data['steps']:
+        html_content += f"""
+        <div class="step">
+            <div class="step-header">
+                <div class="step-number">{step['step_number']}</div>
+                <h2 class="step-title">{step['title']}</h2>
+            </div>
+            <div class="step-explanation">
+                {step['explanation']}
+            </div>
+            <img src="{image_src(step['frame'])}" alt="Step {step['step_number']}" class="step-image">
+            <div class="timestamp">
+                ⏱️ Timestamp: {step['timestamp']:.2f}s 
+                <a href="{youtube_url}&t={int(step['timestamp'])}s" target="_blank">Jump to video</a>
+            </div>
+        </div>
+        """
+    
+    html_content += """
+        <script>
+            // Check for saved theme preference or default to light mode
+            const currentTheme = localStorage.getItem('theme') || 'light';
+            document.documentElement.setAttribute('data-theme', currentTheme);
+            
+            function toggleTheme() {
+                const theme = document.documentElement.getAttribute('data-theme');
+                const newTheme = theme === 'light' ? 'dark' : 'light';
+                document.documentElement.setAttribute('data-theme', newTheme);
+                localStorage.setItem('theme', newTheme);
+            }
+        </script>
+    </body>
+    </html>
+    """
+    return html_content
+
 @app.get("/")
 async def root():
     return {"message": "YouTube to Tutorial API - Use POST /process to convert videos"}
 
+@app.get("/health/live")
+async def liveness():
+    """The HTTP server is up (for container health checks)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Jobs are restored and the pipeline's modules are loaded; 503 until then"""
+    modules_loaded = all(module in readiness["modules"] for module in PIPELINE_MODULES) or not PRELOAD_PIPELINE_MODULES
+    ready = readiness["jobs_restored"] and modules_loaded
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "starting", **readiness},
+    )
+
+def validate_request(request: VideoRequest):
+    if request.start is not None and request.start < 0:
+        raise HTTPException(status_code=400, detail="start must not be negative")
+    if request.end is not None and request.end <= (request.start or 0):
+        raise HTTPException(status_code=400, detail="end must be after start")
+    engine = request.transcription.engine
+    if engine and engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown transcription engine: {engine}")
+    if request.caption_policy and request.caption_policy not in CAPTION_POLICIES:
+        raise HTTPException(status_code=400, detail=f"Unknown caption policy: {request.caption_policy}")
+    if request.youtube_url.startswith("file://") and not ALLOW_LOCAL_FILES:
+        raise HTTPException(status_code=400, detail="Local files are not allowed")
+
+def preflight(request: VideoRequest):
+    """Probe the video's metadata, then estimate and admit the job (blocking)"""
+    try:
+        info = None if request.youtube_url.startswith("file://") else estimator.extract_info(request.youtube_url)
+        probe = estimator.probe_video(request.youtube_url, info)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read video metadata: {e}")
+    
+    # Limits and estimates apply to the section that will actually be processed
+    section = dict(probe)
+    if probe.get('duration') and (request.start is not None or request.end is not None):
+        start = request.start or 0.0
+        if start >= probe['duration']:
+            raise HTTPException(status_code=400, detail=f"start is past the end of the video ({probe['duration']:.0f}s)")
+        section['duration'] = min(request.end or probe['duration'], probe['duration']) - start
+        if probe.get('filesize'):
+            section['filesize'] = probe['filesize'] * section['duration'] / probe['duration']
+    
+    decision, reasons, options = estimator.admission_check(section, request, DEFAULT_CAPTION_POLICY)
+    uses_captions = estimator.captions_usable(probe, options.caption_policy or DEFAULT_CAPTION_POLICY)
+    return {
+        "video": probe,
+        "processed_seconds": section['duration'],
+        "decision": decision,
+        "reasons": reasons,
+        "options": options,
+        "uses_captions": uses_captions,
+        "estimate": estimator.estimate_job(section, options, uses_captions),
+        # yt-dlp's info, for the download to reuse
+        "info": info,
+    }
+
+@app.post("/estimate")
+async def estimate(request: VideoRequest):
+    """Predict processing time and LLM cost for a video without starting a job"""
+    validate_request(request)
+    result = await run_in_threadpool(preflight, request)
+    del result["info"]
+    result["options"] = result["options"].model_dump()
+    return result
+
+def client_id_for(http_request: Request):
+    """Identify the submitting client for fair-share scheduling"""
+    return http_request.headers.get("X-Client-ID") or (http_request.client.host if http_request.client else "anonymous")
+
+def submit_job(request: VideoRequest, video_seconds, client_id, job_id=None, info=None, **extra):
+    """Create a job's checkpoint and queue it with the scheduler (``info``: yt-dlp's info from admission)"""
+    job_id = job_id or str(uuid.uuid4())
+    leader = single_flight.join(flight_key(request), job_id) if SINGLE_FLIGHT else None
+    if leader is not None:
+        # The same work is already queued or running: mirror that job instead of repeating it
+        Checkpoint(f"jobs/{job_id}").set_state("following", leader=leader, youtube_url=request.youtube_url,
+                                               request=request.model_dump(), client_id=client_id, **extra)
+        metrics.JOBS_COALESCED.inc()
+        print(f"Job {job_id} follows identical job {leader}")
+        return job_id
+    # Recorded up front so a restart before the job starts can still pick it up
+    Checkpoint(f"jobs/{job_id}").set_state("queued", youtube_url=request.youtube_url, request=request.model_dump(),
+                                           video_seconds=video_seconds, client_id=client_id, **extra)
+    processing_status[job_id] = {"status": "queued", "progress": 0}
+    if info is not None:
+        probed_info[job_id] = (info, time.time())
+    metrics.JOBS_QUEUED.inc()
+    job_scheduler.submit(job_id, process_video_task, request.youtube_url, job_id, request,
+                         video_seconds=video_seconds, client_id=client_id)
+    return job_id
+
 @app.post("/process")
-async def process_video(request: VideoRequest, background_tasks: BackgroundTasks):
+async def process_video(request: VideoRequest, http_request: Request):
     """Start video processing"""
+    validate_request(request)
+    
+    # Chosen up front so the request is the first span of the job's trace
     job_id = str(uuid.uuid4())
+    with tracing.span("POST /process", job_id=job_id, youtube_url=request.youtube_url):
+        admission = None
+        if ADMISSION_CHECK:
+            try:
+                with tracing.span("admission_check"):
+                    admission = await run_in_threadpool(preflight, request)
+                if admission["decision"] == "reject":
+                    raise HTTPException(status_code=400, detail=f"Job rejected: {'; '.join(admission['reasons'])}")
+            except HTTPException:
+                # No job was created
+                tracing.forget(job_id)
+                raise
+            # A downgraded job runs with the cheaper settings
+            request = admission["options"]
+        
+        video_seconds = admission["processed_seconds"] if admission else None
+        submit_job(request, video_seconds, client_id_for(http_request), job_id=job_id,
+                   info=admission["info"] if admission else None)
     
-    background_tasks.add_task(process_video_task, request.youtube_url, job_id)
+    response = {"job_id": job_id, "message": "Processing started"}
+    leader = single_flight.leader_of(job_id)
+    if leader != job_id:
+        response.update(message="Joined an identical job in progress", leader_job_id=leader)
+    if admission:
+        response.update(
+            admission=admission["decision"],
+            reasons=admission["reasons"],
+            estimate=admission["estimate"],
+        )
+    return response
+
+def plan_batch_item(item, options: VideoRequest):
+    """Admission check for one batch item, returns (decision, reasons, options, video_seconds, info)"""
+    if not ADMISSION_CHECK:
+        return "accept", [], options, item['duration'], None
+    if item['duration'] is None:
+        # Plain URLs need a probe; playlist entries already carry their duration
+        try:
+            result = preflight(options)
+        except HTTPException as e:
+            return "reject", [e.detail], options, None, None
+        return result["decision"], result["reasons"], result["options"], result["processed_seconds"], result["info"]
+    probe = {'duration': item['duration'], 'filesize': None, 'manual_captions': [], 'auto_captions': []}
+    decision, reasons, options = estimator.admission_check(probe, options, DEFAULT_CAPTION_POLICY)
+    return decision, reasons, options, item['duration'], None
+
+def plan_batch(request: BatchRequest):
+    """Expand a batch request into admitted items (blocking)"""
+    try:
+        items, duplicates = expand_batch(request.urls, request.playlist_url)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not expand playlist: {e}")
+    if not items:
+        raise HTTPException(status_code=400, detail="No videos to process")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch has {len(items)} videos (limit {MAX_BATCH_SIZE})")
+    
+    planned = []
+    for item in items:
+        options = VideoRequest(youtube_url=item['url'], transcription=request.transcription,
+                               tutorial=request.tutorial, caption_policy=request.caption_policy)
+        validate_request(options)
+        decision, reasons, options, video_seconds, info = plan_batch_item(item, options)
+        planned.append((item, decision, reasons, options, video_seconds, info))
+    return planned, duplicates
+
+@app.post("/process-batch")
+async def process_batch(request: BatchRequest, http_request: Request):
+    """Start processing a list of videos and/or a playlist as one batch"""
+    if not request.urls and not request.playlist_url:
+        raise HTTPException(status_code=400, detail="Provide urls and/or playlist_url")
+    
+    planned, duplicates = await run_in_threadpool(plan_batch, request)
+    
+    batch_id = str(uuid.uuid4())
+    client_id = client_id_for(http_request)
+    items = []
+    for item, decision, reasons, options, video_seconds, _ in planned:
+        # Job IDs are registered with the batch before the jobs start, so the
+        # first LLM call already goes through the batch's budget
+        job_id = str(uuid.uuid4()) if decision != "reject" else None
+        items.append({**item, 'duration': video_seconds, 'job_id': job_id, 'admission': decision, 'reasons': reasons})
+    batch_registry.add({
+        'batch_id': batch_id,
+        'created_at': time.time(),
+        'client_id': client_id,
+        'request': request.model_dump(),
+        'items': items,
+        'duplicates': duplicates,
+    })
+    for item, (_, _, _, options, video_seconds, info) in zip(items, planned):
+        if item['job_id']:
+            submit_job(options, video_seconds, client_id, job_id=item['job_id'], info=info, batch_id=batch_id)
+    
+    return {
+        "batch_id": batch_id,
+        "jobs": [{"video_id": item['video_id'], "job_id": item['job_id'], "admission": item['admission'],
+                  "reasons": item['reasons']} for item in items],
+        "duplicates": duplicates,
+        "message": f"Processing {sum(1 for item in items if item['job_id'])} of {len(items)} videos",
+    }
+
+@app.get("/batch/{batch_id}")
+async def get_batch(batch_id: str):
+    """Aggregate progress and per-item results of a batch"""
+    batch = batch_registry.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    items, counts, progress = [], {}, []
+    for item in batch['items']:
+        result = {k: item[k] for k in ('video_id', 'url', 'title', 'duration', 'job_id', 'admission', 'reasons')}
+        if item['job_id']:
+            # Jobs evicted by the retention policy are no longer known
+            status = job_status(item['job_id']) or {"status": "expired", "progress": 100}
+            result.update(status=status["status"], progress=status.get("progress", 0))
+            if status["status"] == "completed":
+                result.update(title=status["tutorial_data"].get("title"), tutorial_url=f"/tutorial/{item['job_id']}")
+            elif status["status"] == "error":
+                result["message"] = status.get("message")
+            progress.append(100 if status["status"] in FINISHED_STATES else status.get("progress", 0))
+        else:
+            result["status"] = "rejected"
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        items.append(result)
+    
+    active = [item for item in items if item['job_id'] and item['status'] not in (*FINISHED_STATES, "expired")]
+    return {
+        "batch_id": batch_id,
+        "created_at": batch['created_at'],
+        "status": "running" if active else "finished",
+        "progress": round(sum(progress) / len(progress), 1) if progress else 100,
+        "counts": counts,
+        "items": items,
+        "duplicates": batch['duplicates'],
+    }
+
+@app.delete("/batch/{batch_id}")
+async def cancel_batch(batch_id: str):
+    """Cancel every queued or running job of a batch"""
+    batch = batch_registry.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
     
-    return {"job_id": job_id, "message": "Processing started"}
+    cancelled = {}
+    for item in batch['items']:
+        if item['job_id'] and job_status(item['job_id']) is not None:
+            state = cancel(item['job_id'])
+            if state:
+                cancelled[item['job_id']] = state
+    return {"batch_id": batch_id, "jobs": cancelled}
 
-def process_video_task(youtube_url: str, job_id: str):
+def process_video_task(youtube_url: str, job_id: str, options: Optional[VideoRequest] = None):
     """Background task to process video"""
+    with tracing.job_span(job_id, youtube_url=youtube_url):
+        if options is not None and options.profile:
+            return run_profiled(f"jobs/{job_id}/output", _process_video, youtube_url, job_id, options)
+        return _process_video(youtube_url, job_id, options)
+
+def _process_video(youtube_url: str, job_id: str, options: Optional[VideoRequest] = None):
+    metrics.JOBS_QUEUED.dec()
+    metrics.JOBS_IN_FLIGHT.inc()
+    options = options or VideoRequest(youtube_url=youtube_url)
+    Checkpoint(f"jobs/{job_id}").set_state("running", youtube_url=youtube_url, request=options.model_dump())
     try:
-        processor = YouTubeVideoProcessor(youtube_url, job_id)
+        processor = YouTubeVideoProcessor(youtube_url, job_id, options)
+        resumed = bool(processor.checkpoint.completed_stages())
+        processor.prepare()
         tutorial_data = processor.extract_text_and_frames()
-        html_path = processor.generate_html(tutorial_data)
+        with stage_timer(job_id, 'html'):
+            html_path = processor.generate_html(tutorial_data)
+        metrics.record_bytes('html', html_path)
+        metrics.save_job_timings(job_id, processor.job_dir)
+        # Resumed jobs only timed part of the pipeline, which would skew the estimates
+        if not resumed:
+            record_job_history(processor)
+        processor.checkpoint.complete('html', html_path=html_path)
+        processor.checkpoint.set_state("completed")
         
         processing_status[job_id] = {
             "status": "completed",
@@ -526,24 +1257,373 @@ def process_video_task(youtube_url: str, job_id: str):
             "tutorial_data": tutorial_data,
             "job_dir": processor.job_dir
         }
+        metrics.JOBS_FINISHED.labels('completed').inc()
+        index_tutorial(job_id, tutorial_data)
+    except JobCancelled:
+        print(f"Job {job_id} cancelled")
+        finish_cancelled(job_id)
     except Exception as e:
         processing_status[job_id] = {
             "status": "error",
             "message": str(e),
             "progress": 0
         }
+        Checkpoint(f"jobs/{job_id}").set_state("error", message=str(e))
+        metrics.JOBS_FINISHED.labels('error').inc()
+    finally:
+        tracing.set_attributes(outcome=processing_status.get(job_id, {}).get("status"))
+        single_flight.finish(job_id)
+        metrics.JOBS_IN_FLIGHT.dec()
+        retention.request_sweep()
+
+def job_is_busy(job_id: str):
+    """Whether a job's files are in use (so retention must leave them alone)"""
+    lock = regenerate_locks.get(job_id)
+    if lock is not None and lock.locked():
+        return True
+    if job_id in processing_status:
+        return processing_status[job_id]["status"] not in FINISHED_STATES
+    return Checkpoint(f"jobs/{job_id}").state in INTERRUPTED_STATES
+
+def job_is_completed(job_id: str):
+    return processing_status.get(job_id, {}).get("status") == "completed"
+
+def forget_job(job_id: str):
+    """Called when retention evicts a job"""
+    processing_status.pop(job_id, None)
+    probed_info.pop(job_id, None)
+    search_index.remove_job(job_id)
+    tracing.forget(job_id)
+    metrics.forget_job(job_id)
+
+def index_tutorial(job_id: str, tutorial_data):
+    """Add a job's current tutorial and transcript to the search index"""
+    try:
+        transcript_path = f"jobs/{job_id}/transcript.bin"
+        transcript = load_transcript(transcript_path) if os.path.exists(transcript_path) else ()
+        search_index.index_job(job_id, tutorial_data, transcript, Checkpoint(f"jobs/{job_id}").data.get('youtube_url'))
+    except Exception as e:
+        # The job itself is fine, it just cannot be found by /search
+        print(f"[Search] Could not index job {job_id}: {e}")
+
+def index_completed_jobs():
+    """Index jobs that completed before the search index existed"""
+    indexed = search_index.indexed_jobs()
+    missing = [job_id for job_id, status in list(processing_status.items())
+               if status["status"] == "completed" and job_id not in indexed]
+    for job_id in missing:
+        index_tutorial(job_id, processing_status[job_id]["tutorial_data"])
+    if missing:
+        print(f"[Search] Indexed {len(missing)} existing tutorials")
+
+def finish_cancelled(job_id: str, outcome: str = "cancelled"):
+    """Mark a job cancelled and clean up its files according to CANCELLED_JOB_ARTIFACTS"""
+    single_flight.finish(job_id)
+    processing_status[job_id] = {"status": "cancelled", "progress": 0}
+    probed_info.pop(job_id, None)
+    metrics.JOBS_FINISHED.labels(outcome).inc()
+    job_dir = f"jobs/{job_id}"
+    if CANCELLED_JOB_ARTIFACTS == "delete":
+        shutil.rmtree(job_dir, ignore_errors=True)
+        metrics.forget_job(job_id)
+        return
+    
+    checkpoint = Checkpoint(job_dir)
+    # Frames of an unfinished extraction are redone on retry anyway
+    if not checkpoint.is_done('frame_extraction'):
+        shutil.rmtree(f"{job_dir}/frames", ignore_errors=True)
+    checkpoint.set_state("cancelled")
+
+def record_job_history(processor):
+    """Add a finished job's timings to the history the /estimate predictions are based on"""
+    if not processor.video_duration:
+        return
+    estimator.record_job_history({
+        "video_seconds": processor.video_duration,
+        "transcription": estimator.transcription_key(processor.transcription_options),
+        "captions": bool(processor.caption_transcript),
+        "frame_selection": processor.tutorial_options.frame_selection,
+        "stages": metrics.get_job_timings(processor.job_id),
+        "llm_tokens": metrics.get_job_llm_usage(processor.job_id),
+    })
+
+def schedule_existing_job(job_id: str, checkpoint: Checkpoint):
+    """Queue a job that already has a checkpoint (retried or resumed)"""
+    options = VideoRequest(**checkpoint.request)
+    processing_status[job_id] = {"status": "queued", "progress": 0}
+    metrics.JOBS_QUEUED.inc()
+    video_seconds = checkpoint.get('download').get('duration') or checkpoint.data.get('video_seconds')
+    job_scheduler.submit(job_id, process_video_task, options.youtube_url, job_id, options,
+                         video_seconds=video_seconds, client_id=checkpoint.data.get('client_id', "anonymous"))
+
+def restore_jobs():
+    """Rebuild job status from checkpoint manifests and resume interrupted jobs"""
+    for job_id, checkpoint in find_checkpoints():
+        if checkpoint.state == "completed":
+            try:
+                with open(f"{checkpoint.job_dir}/output/tutorial.json", 'r', encoding='utf-8') as f:
+                    tutorial_data = json.load(f)
+            except Exception as e:
+                print(f"Could not restore job {job_id}: {e}")
+                continue
+            processing_status[job_id] = {
+                "status": "completed",
+                "progress": 100,
+                "html_path": f"{checkpoint.job_dir}/output/tutorial.html",
+                "tutorial_data": tutorial_data,
+                "job_dir": checkpoint.job_dir
+            }
+        elif checkpoint.state == "error":
+            processing_status[job_id] = {"status": "error", "message": checkpoint.data.get("message"), "progress": 0}
+        elif checkpoint.state == "cancelled":
+            processing_status[job_id] = {"status": "cancelled", "progress": 0}
+        elif checkpoint.state == "following":
+            single_flight.follow(job_id, checkpoint.data["leader"])
+        elif checkpoint.state in INTERRUPTED_STATES and RESUME_INTERRUPTED_JOBS:
+            print(f"Resuming interrupted job {job_id} after stages: {checkpoint.completed_stages()}")
+            schedule_existing_job(job_id, checkpoint)
+
+@app.post("/retry/{job_id}")
+async def retry_job(job_id: str):
+    """Resume a failed job from its last completed stage"""
+    # A follower's work is its leader's
+    job_id = single_flight.leader_of(job_id)
+    checkpoint = Checkpoint(f"jobs/{job_id}")
+    if not checkpoint.exists():
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    status = processing_status.get(job_id, {}).get("status")
+    if checkpoint.state == "completed" and len(checkpoint.completed_stages()) == len(STAGE_ORDER):
+        raise HTTPException(status_code=400, detail="Job already completed")
+    if status not in (None, "error", "completed", "cancelled"):
+        raise HTTPException(status_code=400, detail=f"Job is still {status}")
+    
+    schedule_existing_job(job_id, checkpoint)
+    
+    return {
+        "job_id": job_id,
+        "message": "Resuming from last completed stage",
+        "completed_stages": checkpoint.completed_stages()
+    }
+
+def job_status(job_id: str):
+    """Status of a job (a follower reports its leader's), None for unknown jobs"""
+    if job_id in single_flight.detached:
+        return {"status": "cancelled", "progress": 0}
+    leader = single_flight.leader_of(job_id)
+    status = processing_status.get(leader)
+    if status is not None and leader != job_id:
+        return {**status, "leader_job_id": leader}
+    return status
+
+def cancel(job_id: str):
+    """Cancel a job, returns its new status or None if it was not queued or running"""
+    leader = single_flight.leader_of(job_id)
+    if job_scheduler.describe(leader) is None:
+        return None
+    if job_id in single_flight.detached:
+        # This submission was already cancelled, its work goes on for the followers
+        return None
+    orphaned = single_flight.leave(job_id)
+    if job_id != leader:
+        # A follower only stops mirroring; the work goes on unless nobody else waits for it
+        finish_cancelled(job_id, outcome="detached")
+        if orphaned:
+            cancel(orphaned)
+        return "cancelled"
+    if orphaned is None:
+        # Followers still wait for this job's work, only this submission is cancelled. The
+        # job itself is counted once, with its real outcome, when it finishes
+        metrics.JOBS_FINISHED.labels('detached').inc()
+        return "cancelled"
+    
+    state = job_scheduler.cancel(job_id)
+    if state == "queued":
+        metrics.JOBS_QUEUED.dec()
+        finish_cancelled(job_id)
+        return "cancelled"
+    # A running job stops at its next cancellation check and then reports "cancelled"
+    return "cancelling" if state == "running" else None
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    if job_status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    status = cancel(job_id)
+    if status is None:
+        raise HTTPException(status_code=400, detail=f"Job is already {job_status(job_id)['status']}")
+    return {"job_id": job_id, "status": status}
+
+# One regeneration at a time per job, so versions are numbered consistently
+regenerate_locks = {}
+
+def regenerate_tutorial(job_id: str, request: RegenerateRequest):
+    """Re-run structuring and/or matching on a job's stored transcript and frames"""
+    with regenerate_locks.setdefault(job_id, threading.Lock()):
+        with tracing.span("regenerate", job_id=job_id, rerun=request.rerun):
+            return _regenerate_tutorial(job_id, request)
+
+def job_processor(job_id: str, tutorial: Optional[TutorialOptions] = None):
+    """Processor for an existing job, built from its checkpointed request"""
+    options = VideoRequest(**Checkpoint(f"jobs/{job_id}").request)
+    if tutorial is not None:
+        options.tutorial = tutorial
+    return YouTubeVideoProcessor(options.youtube_url, job_id, options)
+
+def job_video_url(job_id: str):
+    """The video URL saved in a job's checkpoint, which its tutorial HTML links to"""
+    youtube_url = Checkpoint(f"jobs/{job_id}").data.get('youtube_url')
+    if not youtube_url:
+        raise HTTPException(status_code=409, detail="The job's checkpoint has no video URL")
+    return youtube_url
+
+def _regenerate_tutorial(job_id: str, request: RegenerateRequest):
+    checkpoint = Checkpoint(f"jobs/{job_id}")
+    processor = job_processor(job_id, request.tutorial)
+    
+    transcript = load_transcript(processor.transcript_path)
+    frames = processor._load_frames(checkpoint.get('frame_extraction')['frames'])
+    
+    if request.rerun == "structuring" or not checkpoint.is_done('structuring'):
+        with stage_timer(job_id, 'structuring'):
+            structure = processor._structure_tutorial_with_gpt(transcript.full_text())
+        if processor.structure_is_fallback:
+            raise HTTPException(status_code=502, detail="Tutorial structuring failed, try again later")
+        checkpoint.complete('structuring', structure=structure)
+    else:
+        structure = checkpoint.get('structuring')['structure']
+    
+    with stage_timer(job_id, 'matching'):
+        tutorial_data = processor._match_frames_to_steps(structure, frames, transcript)
+    
+    # Keep every version; the newest one becomes the job's current tutorial
+    versions = checkpoint.data.setdefault('versions', [])
+    if not versions:
+        os.makedirs(f"{processor.job_dir}/output/versions/1", exist_ok=True)
+        shutil.copyfile(f"{processor.job_dir}/output/tutorial.json", f"{processor.job_dir}/output/versions/1/tutorial.json")
+        versions.append({"version": 1, "tutorial": checkpoint.request.get('tutorial'), "created_at": checkpoint.get('matching').get('completed_at')})
+    version = len(versions) + 1
+    os.makedirs(f"{processor.job_dir}/output/versions/{version}", exist_ok=True)
+    for path in (f"{processor.job_dir}/output/versions/{version}/tutorial.json", f"{processor.job_dir}/output/tutorial.json"):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(tutorial_data, f, ensure_ascii=False)
+    versions.append({"version": version, "tutorial": request.tutorial.model_dump(), "created_at": time.time()})
+    checkpoint.data['request']['tutorial'] = request.tutorial.model_dump()
+    checkpoint.complete('matching', tutorial_path=f"{processor.job_dir}/output/tutorial.json")
+    
+    html_path = processor.generate_html(tutorial_data)
+    processing_status[job_id] = {
+        "status": "completed",
+        "progress": 100,
+        "html_path": html_path,
+        "tutorial_data": tutorial_data,
+        "job_dir": processor.job_dir,
+        "version": version
+    }
+    index_tutorial(job_id, tutorial_data)
+    return version, tutorial_data
+
+@app.post("/regenerate/{job_id}")
+async def regenerate(job_id: str, request: RegenerateRequest):
+    """Build a new tutorial version from a finished job with different structure settings"""
+    if single_flight.leader_of(job_id) != job_id:
+        raise HTTPException(status_code=400, detail="This job mirrors another submission's tutorial, submit the video again to get your own")
+    if job_id not in processing_status:
+        raise HTTPException(status_code=404, detail="Job not found")
+    checkpoint = Checkpoint(f"jobs/{job_id}")
+    if processing_status[job_id]["status"] != "completed" or not checkpoint.is_done('frame_extraction'):
+        raise HTTPException(status_code=400, detail="Tutorial not ready yet")
+    if not all(os.path.exists(frame['path']) for frame in checkpoint.get('frame_extraction')['frames']):
+        raise HTTPException(status_code=400, detail="Unused frames of this job were removed to save disk space, submit the video again")
+    retention.touch(job_id)
+    
+    version, tutorial_data = await run_in_threadpool(regenerate_tutorial, job_id, request)
+    return {"job_id": job_id, "version": version, "tutorial_data": tutorial_data}
 
 @app.get("/status/{job_id}")
 async def get_status(job_id: str):
     """Get processing status"""
+    status = job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    priority = job_scheduler.describe(single_flight.leader_of(job_id))
+    if priority and status["status"] != "cancelled":
+        return {**status, "priority": priority}
+    return status
+
+@app.get("/timings/{job_id}")
+async def get_timings(job_id: str):
+    """Get the per-stage timing breakdown (wall and CPU seconds) and critical path of a job"""
+    job_id = single_flight.leader_of(job_id)
+    if job_id not in processing_status:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return {
+        "job_id": job_id,
+        "stages": metrics.get_job_timings(job_id),
+        "critical_path": metrics.get_job_critical_path(job_id),
+    }
+
+@app.get("/jobs/{job_id}/trace")
+async def get_trace(job_id: str):
+    """Waterfall of a job's trace: its request, stages, OpenAI calls and PDF renders"""
+    job_id = single_flight.leader_of(job_id)
+    if job_status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    trace = await run_in_threadpool(tracing.waterfall, job_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="No trace recorded for this job")
+    return trace
+
+@app.get("/profile/{job_id}/{kind}")
+async def get_profile(job_id: str, kind: str):
+    """Download a profiled job's pstats or collapsed-stack (flamegraph) file"""
+    job_id = single_flight.leader_of(job_id)
     if job_id not in processing_status:
         raise HTTPException(status_code=404, detail="Job not found")
+    if kind not in PROFILE_ARTIFACTS:
+        raise HTTPException(status_code=400, detail=f"Unknown profile format: {kind}. Use one of: {', '.join(PROFILE_ARTIFACTS)}")
     
-    return processing_status[job_id]
+    filename, media_type = PROFILE_ARTIFACTS[kind]
+    profile_path = f"jobs/{job_id}/output/{filename}"
+    if not os.path.exists(profile_path):
+        raise HTTPException(status_code=404, detail="Profile not found (submit the job with profile=true)")
+    
+    return FileResponse(profile_path, media_type=media_type, filename=f"{job_id}_{filename}")
+
+@app.get("/search")
+async def search_tutorials(q: str, limit: int = 20):
+    """Find completed tutorials by title, step text or transcript"""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Empty search query")
+    
+    search_start = time.perf_counter()
+    results = await run_in_threadpool(search_index.search, q, max(1, min(limit, 100)))
+    return {
+        "query": q,
+        "took_ms": round((time.perf_counter() - search_start) * 1000, 1),
+        "results": results,
+    }
+
+@app.get("/storage")
+async def get_storage():
+    """Disk usage of the jobs directory by artifact type"""
+    return await run_in_threadpool(retention.usage)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics"""
+    body, content_type = metrics.render_metrics()
+    return Response(content=body, media_type=content_type)
 
 @app.get("/tutorial/{job_id}")
 async def get_tutorial(job_id: str):
     """Get tutorial HTML"""
+    job_id = single_flight.leader_of(job_id)
     if job_id not in processing_status:
         raise HTTPException(status_code=404, detail="Job not found")
     
@@ -551,15 +1631,17 @@ async def get_tutorial(job_id: str):
     if status["status"] != "completed":
         raise HTTPException(status_code=400, detail="Tutorial not ready yet")
     
-    html_path = status["html_path"]
-    with open(html_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    retention.touch(job_id)
+    # The stored tutorial.html points at files on this server's disk, serve the images over /image instead
+    html_content = render_tutorial_html(job_video_url(job_id), status["tutorial_data"],
+                                        lambda path: f"/image/{job_id}/{os.path.basename(path)}")
     
     return HTMLResponse(content=html_content)
 
 @app.get("/tutorial-data/{job_id}")
-async def get_tutorial_data(job_id: str):
-    """Get tutorial data as JSON"""
+async def get_tutorial_data(job_id: str, version: Optional[int] = None):
+    """Get tutorial data as JSON (the latest version unless one is given)"""
+    job_id = single_flight.leader_of(job_id)
     if job_id not in processing_status:
         raise HTTPException(status_code=404, detail="Job not found")
     
@@ -567,19 +1649,90 @@ async def get_tutorial_data(job_id: str):
     if status["status"] != "completed":
         raise HTTPException(status_code=400, detail="Tutorial not ready yet")
     
+    retention.touch(job_id)
+    if version is not None:
+        version_path = f"jobs/{job_id}/output/versions/{version}/tutorial.json"
+        if not os.path.exists(version_path):
+            raise HTTPException(status_code=404, detail="Version not found")
+        return FileResponse(version_path, media_type="application/json")
+    
     return JSONResponse(content=status["tutorial_data"])
 
+@app.get("/export/{job_id}")
+async def export_tutorial(job_id: str, version: Optional[int] = None):
+    """Download the tutorial as a zip of HTML, images and JSON that works offline"""
+    job_id = single_flight.leader_of(job_id)
+    if job_id not in processing_status:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    status = processing_status[job_id]
+    if status["status"] != "completed":
+        raise HTTPException(status_code=400, detail="Tutorial not ready yet")
+    
+    retention.touch(job_id)
+    job_dir = f"jobs/{job_id}"
+    versions = Checkpoint(job_dir).data.get('versions', [])
+    latest = len(versions) or 1
+    version = version or latest
+    
+    tutorial_data = status["tutorial_data"]
+    if version != latest:
+        version_path = f"{job_dir}/output/versions/{version}/tutorial.json"
+        if not os.path.exists(version_path):
+            raise HTTPException(status_code=404, detail="Version not found")
+        with open(version_path, 'r', encoding='utf-8') as f:
+            tutorial_data = json.load(f)
+    
+    filename = re.sub(r'[^A-Za-z0-9_-]+', '_', tutorial_data.get('title') or '').strip('_')[:60] or job_id
+    cache_path = export_path(job_dir, version)
+    if os.path.exists(cache_path):
+        return FileResponse(cache_path, media_type="application/zip", filename=f"{filename}.zip")
+    
+    frames = [step['frame'] for step in tutorial_data['steps']]
+    if not all(os.path.exists(frame) for frame in frames):
+        raise HTTPException(status_code=400, detail="Images of this version were removed to save disk space")
+    images = {f"images/{os.path.basename(frame)}": frame for frame in frames}
+    html = render_tutorial_html(job_video_url(job_id), tutorial_data, lambda path: f"images/{os.path.basename(path)}")
+    exported_data = {**tutorial_data, 'steps': [
+        {**step, 'frame': f"images/{os.path.basename(step['frame'])}"} for step in tutorial_data['steps']
+    ]}
+    return StreamingResponse(
+        stream_export(cache_path, html, exported_data, images.items()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.zip"'},
+    )
+
+def thumbnail(job_id, filename, width):
+    """Path of the frame scaled down to ``width`` pixels, created on first request"""
+    thumbnail_path = f"jobs/{job_id}/output/thumbnails/{width}/{filename}"
+    if not os.path.exists(thumbnail_path):
+        os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+        data = optimize_image(f"jobs/{job_id}/frames/{filename}", max_width=width, quality=THUMBNAIL_QUALITY)
+        tmp_path = f"{thumbnail_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, thumbnail_path)
+    return thumbnail_path
+
 @app.get("/image/{job_id}/{filename}")
-async def get_image(job_id: str, filename: str):
-    """Serve image files for display in Streamlit"""
+async def get_image(job_id: str, filename: str, width: Optional[int] = None):
+    """Serve image files for display in Streamlit, scaled down to ``width`` pixels if given"""
+    job_id = single_flight.leader_of(job_id)
     if job_id not in processing_status:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    retention.touch(job_id)
     image_path = f"jobs/{job_id}/frames/{filename}"
     
     if not os.path.exists(image_path):
         raise HTTPException(status_code=404, detail="Image not found")
     
+    if width is not None:
+        if not MIN_THUMBNAIL_WIDTH <= width <= MAX_THUMBNAIL_WIDTH:
+            raise HTTPException(status_code=400,
+                                detail=f"width must be between {MIN_THUMBNAIL_WIDTH} and {MAX_THUMBNAIL_WIDTH}")
+        image_path = await run_in_threadpool(thumbnail, job_id, filename, width)
+    
     return FileResponse(image_path, media_type="image/jpeg")
 
 def generate_pdf_html(tutorial_data, job_dir):
@@ -786,6 +1939,7 @@ def generate_pdf_html(tutorial_data, job_dir):
 async def download_pdf(job_id: str):
     """Generate and download tutorial as PDF"""
     print(f"[PDF] Request received for job_id: {job_id}")
+    job_id = single_flight.leader_of(job_id)
     
     if job_id not in processing_status:
         print(f"[PDF] Job not found: {job_id}")
@@ -796,6 +1950,7 @@ async def download_pdf(job_id: str):
         print(f"[PDF] Tutorial not ready: {status['status']}")
         raise HTTPException(status_code=400, detail="Tutorial not ready yet")
     
+    retention.touch(job_id)
     try:
         tutorial_data = status["tutorial_data"]
         job_dir = status["job_dir"]
@@ -805,6 +1960,8 @@ async def download_pdf(job_id: str):
         pdf_html = generate_pdf_html(tutorial_data, job_dir)
         
         # Convert HTML to PDF using pdfkit
+        import pdfkit
+        
         pdf_path = f"{job_dir}/output/tutorial.pdf"
         print(f"[PDF] PDF path: {pdf_path}")
         
@@ -841,10 +1998,13 @@ async def download_pdf(job_id: str):
         # Try to generate PDF
         print(f"[PDF] Starting PDF generation...")
         try:
-            if config:
-                pdfkit.from_string(pdf_html, pdf_path, options=options, configuration=config)
-            else:
-                pdfkit.from_string(pdf_html, pdf_path, options=options)
+            with stage_timer(job_id, 'pdf'):
+                if config:
+                    pdfkit.from_string(pdf_html, pdf_path, options=options, configuration=config)
+                else:
+                    pdfkit.from_string(pdf_html, pdf_path, options=options)
+            metrics.record_bytes('pdf', pdf_path)
+            metrics.save_job_timings(job_id, job_dir)
             
             print(f"[PDF] PDF created successfully at: {pdf_path}")
         except Exception as e:
@@ -0,0 +1,139 @@
+"""Batch and playlist submissions.
+
+A batch expands a list of URLs and/or a playlist into individual videos,
+de-duplicated by YouTube video ID, and runs them as ordinary jobs. The jobs
+of a batch share one LLM request budget (``BATCH_LLM_REQUESTS_PER_MINUTE``),
+so a 50-video playlist does not flood the OpenAI API; transcription models are
+already shared by every job in the process.
+
+Batch manifests are stored as ``jobs/batch-{batch_id}.json`` so the grouping
+survives restarts.
+"""
+import json
+import os
+import re
+import threading
+import time
+
+BATCH_LLM_REQUESTS_PER_MINUTE = float(os.getenv("BATCH_LLM_REQUESTS_PER_MINUTE", "60"))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "100"))
+
+_VIDEO_ID = re.compile(r'(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})')
+
+
+def video_id(url):
+    """YouTube video ID of a URL, or the URL itself when it has none"""
+    match = _VIDEO_ID.search(url)
+    return match.group(1) if match else url
+
+
+def is_playlist(url):
+    return 'list=' in url and 'v=' not in url
+
+
+def expand_playlist(playlist_url):
+    """List a playlist's videos (id, url, title, duration) without resolving each one"""
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL({'quiet': True, 'extract_flat': 'in_playlist'}) as ydl:
+        info = ydl.extract_info(playlist_url, download=False)
+    return [
+        {
+            'video_id': entry['id'],
+            'url': f"https://www.youtube.com/watch?v={entry['id']}",
+            'title': entry.get('title'),
+            'duration': entry.get('duration'),
+        }
+        for entry in info.get('entries') or []
+        if entry and entry.get('id')
+    ]
+
+
+def expand_batch(urls, playlist_url=None):
+    """Expand URLs and playlists into unique videos.
+
+    Returns (items, duplicates) where duplicates are the URLs that were
+    dropped because their video was already in the batch.
+    """
+    candidates = []
+    for url in ([playlist_url] if playlist_url else []) + list(urls):
+        if is_playlist(url):
+            candidates += expand_playlist(url)
+        else:
+            candidates.append({'video_id': video_id(url), 'url': url, 'title': None, 'duration': None})
+
+    items, duplicates, seen = [], [], set()
+    for candidate in candidates:
+        if candidate['video_id'] in seen:
+            duplicates.append(candidate['url'])
+            continue
+        seen.add(candidate['video_id'])
+        items.append(candidate)
+    return items, duplicates
+
+
+class RateLimiter:
+    """Token bucket shared by the jobs of a batch"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BatchRegistry:
+    def __init__(self, jobs_dir="jobs", llm_requests_per_minute=BATCH_LLM_REQUESTS_PER_MINUTE):
+        self.jobs_dir = jobs_dir
+        self.llm_requests_per_minute = llm_requests_per_minute
+        self.batches = {}
+        self.job_batches = {}
+        self.limiters = {}
+
+    def _path(self, batch_id):
+        return f'{self.jobs_dir}/batch-{batch_id}.json'
+
+    def add(self, batch):
+        self.batches[batch['batch_id']] = batch
+        self.limiters[batch['batch_id']] = RateLimiter(self.llm_requests_per_minute)
+        for item in batch['items']:
+            if item.get('job_id'):
+                self.job_batches[item['job_id']] = batch['batch_id']
+        self.save(batch['batch_id'])
+
+    def save(self, batch_id):
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        tmp_path = f'{self._path(batch_id)}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.batches[batch_id], f)
+        os.replace(tmp_path, self._path(batch_id))
+
+    def load(self):
+        """Reload batch manifests written before a restart"""
+        if not os.path.isdir(self.jobs_dir):
+            return
+        for name in os.listdir(self.jobs_dir):
+            if name.startswith('batch-') and name.endswith('.json'):
+                with open(f'{self.jobs_dir}/{name}', 'r', encoding='utf-8') as f:
+                    batch = json.load(f)
+                self.batches[batch['batch_id']] = batch
+                self.limiters[batch['batch_id']] = RateLimiter(self.llm_requests_per_minute)
+                for item in batch['items']:
+                    if item.get('job_id'):
+                        self.job_batches[item['job_id']] = batch['batch_id']
+
+    def get(self, batch_id):
+        return self.batches.get(batch_id)
+
+    def limiter_for_job(self, job_id):
+        batch_id = self.job_batches.get(job_id)
+        return self.limiters.get(batch_id) if batch_id else None
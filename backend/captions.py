@@ -0,0 +1,134 @@
+"""Caption-first transcript source.
+
+YouTube exposes manual subtitles and auto-generated captions in the metadata
+yt-dlp already fetches. When the caption policy allows it, they are converted
+to the same ``segments`` structure the Whisper engines produce and the
+transcription stage is skipped entirely.
+"""
+import json
+import os
+import re
+
+# "manual": only uploader-provided subtitles, "auto": manual or auto-generated,
+# "whisper": always transcribe
+CAPTION_POLICIES = ('manual', 'auto', 'whisper')
+DEFAULT_CAPTION_POLICY = os.getenv("CAPTION_POLICY", "manual")
+CAPTION_LANGUAGES = [lang.strip() for lang in os.getenv("CAPTION_LANGUAGES", "en").split(",") if lang.strip()]
+
+# Preferred formats, best first. json3 carries clean per-event timings, while
+# VTT auto captions repeat rolling lines and need de-duplication.
+_FORMAT_PREFERENCE = ('json3', 'vtt')
+
+_VTT_TIMING = re.compile(r'(\d+:)?(\d{2}):(\d{2})\.(\d{3})\s+-->\s+(\d+:)?(\d{2}):(\d{2})\.(\d{3})')
+_VTT_TAG = re.compile(r'<[^>]+>')
+
+
+def _pick_track(tracks, languages):
+    """Pick (language, format entry) from a yt-dlp subtitles dict"""
+    candidates = [lang for lang in languages if lang in tracks]
+    # Auto captions list every machine translation; the "-orig" track is the spoken language
+    candidates += [lang for lang in tracks if lang.endswith('-orig') and lang.split('-')[0] in languages]
+    if not candidates:
+        return None, None
+
+    language = candidates[0]
+    formats = {entry.get('ext'): entry for entry in tracks[language]}
+    for ext in _FORMAT_PREFERENCE:
+        if ext in formats:
+            return language, formats[ext]
+    return None, None
+
+
+def parse_json3(data):
+    segments = []
+    for event in json.loads(data).get('events', []):
+        if not event.get('segs'):
+            continue
+        text = "".join(seg.get('utf8', '') for seg in event['segs']).replace('\n', ' ').strip()
+        if not text:
+            continue
+        start = event.get('tStartMs', 0) / 1000
+        segments.append({
+            'id': len(segments),
+            'start': start,
+            'end': start + event.get('dDurationMs', 0) / 1000,
+            'text': text,
+        })
+    return segments
+
+
+def _vtt_seconds(hours, minutes, seconds, millis):
+    return int((hours or '0:')[:-1]) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def parse_vtt(data):
+    segments = []
+    previous_lines = set()
+    for block in re.split(r'\r?\n\r?\n', data):
+        lines = block.strip().splitlines()
+        timing = None
+        for idx, line in enumerate(lines):
+            timing = _VTT_TIMING.search(line)
+            if timing:
+                lines = lines[idx + 1:]
+                break
+        if not timing:
+            continue
+
+        text_lines = [_VTT_TAG.sub('', line).strip() for line in lines]
+        text_lines = [line for line in text_lines if line]
+        # Rolling auto captions repeat the previous cue's lines
+        new_lines = [line for line in text_lines if line not in previous_lines]
+        previous_lines = set(text_lines)
+        if not new_lines:
+            continue
+
+        groups = timing.groups()
+        segments.append({
+            'id': len(segments),
+            'start': _vtt_seconds(*groups[:4]),
+            'end': _vtt_seconds(*groups[4:]),
+            'text': " ".join(new_lines),
+        })
+    return segments
+
+
+def fetch_caption_transcript(ydl, info_dict, policy=None, languages=None):
+    """Return a transcription-shaped result from the video's captions, or None.
+
+    ``ydl`` is the open ``YoutubeDL`` instance used for ``extract_info``, so
+    captions are fetched with the same session and options as the video.
+    """
+    policy = policy or DEFAULT_CAPTION_POLICY
+    if policy == 'whisper':
+        return None
+
+    languages = list(languages or CAPTION_LANGUAGES)
+    if info_dict.get('language') and info_dict['language'] not in languages:
+        languages.insert(0, info_dict['language'])
+
+    sources = [('manual_captions', info_dict.get('subtitles') or {})]
+    if policy == 'auto':
+        sources.append(('auto_captions', info_dict.get('automatic_captions') or {}))
+
+    for source, tracks in sources:
+        language, track = _pick_track(tracks, languages)
+        if not track:
+            continue
+
+        try:
+            data = ydl.urlopen(track['url']).read().decode('utf-8')
+            segments = parse_json3(data) if track['ext'] == 'json3' else parse_vtt(data)
+        except Exception as e:
+            print(f"Error fetching {source} ({language}): {e}")
+            continue
+
+        if segments:
+            return {
+                'text': " ".join(seg['text'] for seg in segments),
+                'segments': segments,
+                'language': language.split('-')[0],
+                'source': source,
+            }
+
+    return None
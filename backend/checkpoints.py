@@ -0,0 +1,76 @@
+"""Stage-level checkpoint manifests for resumable jobs.
+
+Each job directory holds a ``checkpoint.json`` recording the job's request,
+its overall state and the outputs of every completed pipeline stage. A retried
+or restarted job reads the manifest and skips straight past completed stages.
+"""
+import json
+import os
+import threading
+import time
+
+STAGE_ORDER = ('download', 'transcribe', 'frame_extraction', 'structuring', 'matching', 'html')
+
+# Jobs in these states were cut short by a crash or restart
+INTERRUPTED_STATES = ('queued', 'running')
+
+
+class Checkpoint:
+    def __init__(self, job_dir):
+        self.job_dir = job_dir
+        self.path = f'{job_dir}/checkpoint.json'
+        self.data = {"state": None, "stages": {}}
+        # Independent stages run concurrently and complete into the same manifest
+        self._lock = threading.RLock()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    @property
+    def state(self):
+        return self.data.get("state")
+
+    @property
+    def request(self):
+        return self.data.get("request")
+
+    def completed_stages(self):
+        return [stage for stage in STAGE_ORDER if stage in self.data["stages"]]
+
+    def is_done(self, stage):
+        return stage in self.data["stages"]
+
+    def get(self, stage):
+        return self.data["stages"].get(stage, {})
+
+    def complete(self, stage, **outputs):
+        with self._lock:
+            self.data["stages"][stage] = {"completed_at": time.time(), **outputs}
+            self.save()
+
+    def set_state(self, state, **extra):
+        with self._lock:
+            self.data.update(state=state, updated_at=time.time(), **extra)
+            self.save()
+
+    def save(self):
+        # Write-then-rename so a crash never leaves a truncated manifest
+        with self._lock:
+            os.makedirs(self.job_dir, exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.path)
+
+
+def find_checkpoints(jobs_dir="jobs"):
+    """Yield (job_id, Checkpoint) for every job directory with a manifest"""
+    if not os.path.isdir(jobs_dir):
+        return
+    for job_id in sorted(os.listdir(jobs_dir)):
+        checkpoint = Checkpoint(f'{jobs_dir}/{job_id}')
+        if checkpoint.exists():
+            yield job_id, checkpoint
@@ -0,0 +1,209 @@
+"""Pre-flight metadata probe, processing time / LLM cost estimates and admission limits.
+
+Estimates come from the history of finished jobs (``jobs/stage_history.jsonl``):
+stages whose cost grows with video length (download, transcription, frame
+extraction, LLM tokens) are modelled as a rate per video second, the rest as
+a fixed cost. Built-in defaults are used until enough history exists.
+"""
+import json
+import os
+import statistics
+import threading
+
+
+HISTORY_PATH = "jobs/stage_history.jsonl"
+HISTORY_WINDOW = 200
+
+# Reject videos longer than this (seconds, 0 disables)
+MAX_VIDEO_DURATION = float(os.getenv("MAX_VIDEO_DURATION", "7200"))
+# Downgrade videos longer than this to cheaper settings (seconds, 0 disables)
+DOWNGRADE_DURATION = float(os.getenv("DOWNGRADE_DURATION", "2700"))
+# Reject videos whose download is larger than this (bytes, 0 disables)
+MAX_FILESIZE = float(os.getenv("MAX_FILESIZE", "0"))
+# Reject jobs whose estimated LLM cost is above this (USD, 0 disables)
+MAX_ESTIMATED_COST = float(os.getenv("MAX_ESTIMATED_COST", "0"))
+
+# gpt-4o-mini list prices, USD per million tokens
+LLM_INPUT_PRICE = float(os.getenv("LLM_INPUT_PRICE_PER_MTOK", "0.15"))
+LLM_OUTPUT_PRICE = float(os.getenv("LLM_OUTPUT_PRICE_PER_MTOK", "0.60"))
+
+# Stages whose time is proportional to video length
+PER_SECOND_STAGES = ('download', 'transcribe', 'frame_extraction')
+
+# Used until there is history: seconds per video second, or seconds
+DEFAULT_STAGE_COSTS = {
+    'download': 0.05,
+    'model_load': 5.0,
+    'transcribe': 0.5,
+    'frame_extraction': 0.02,
+    'structuring': 20.0,
+    'matching': 30.0,
+    'html': 0.1,
+}
+DEFAULT_PROMPT_TOKENS_PER_SECOND = 40.0
+DEFAULT_COMPLETION_TOKENS_PER_SECOND = 1.0
+
+_history_lock = threading.Lock()
+
+
+def extract_info(video_url):
+    """yt-dlp's info dict for a video, without downloading any media"""
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL({'format': 'best', 'quiet': True}) as ydl:
+        # Sanitized as for an info JSON file, so it can be handed back to yt-dlp to download
+        return ydl.sanitize_info(ydl.extract_info(video_url, download=False), remove_private_keys=True)
+
+
+def probe_video(video_url, info=None):
+    """Video metadata without downloading any media (``info``: yt-dlp's info dict, if already extracted)"""
+    if video_url.startswith("file://"):
+        import cv2
+
+        video = cv2.VideoCapture(video_url[len("file://"):])
+        fps = video.get(cv2.CAP_PROP_FPS) or 1
+        duration = video.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+        video.release()
+        return {
+            'title': os.path.basename(video_url),
+            'duration': duration,
+            'filesize': os.path.getsize(video_url[len("file://"):]),
+            'formats': 1,
+            'max_height': None,
+            'manual_captions': [],
+            'auto_captions': [],
+        }
+
+    info = info or extract_info(video_url)
+    formats = info.get('formats') or []
+    return {
+        'title': info.get('title'),
+        'duration': info.get('duration'),
+        'filesize': info.get('filesize') or info.get('filesize_approx'),
+        'formats': len(formats),
+        'max_height': max((f.get('height') or 0 for f in formats), default=None),
+        'manual_captions': sorted(info.get('subtitles') or {}),
+        'auto_captions': sorted(lang for lang in (info.get('automatic_captions') or {}) if lang.endswith('-orig')),
+    }
+
+
+def record_job_history(entry):
+    """Append a finished job's stage timings and token usage to the history"""
+    os.makedirs(os.path.dirname(HISTORY_PATH), exist_ok=True)
+    with _history_lock:
+        with open(HISTORY_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def load_history():
+    if not os.path.exists(HISTORY_PATH):
+        return []
+    with _history_lock:
+        with open(HISTORY_PATH, 'r', encoding='utf-8') as f:
+            lines = f.readlines()[-HISTORY_WINDOW:]
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def _stage_cost(history, stage, transcription_key=None):
+    samples = []
+    for entry in history:
+        if stage == 'transcribe' and transcription_key and entry.get('transcription') != transcription_key:
+            continue
+        timing = entry.get('stages', {}).get(stage)
+        if not timing or not entry.get('video_seconds'):
+            continue
+        samples.append(timing['wall'] / entry['video_seconds'] if stage in PER_SECOND_STAGES else timing['wall'])
+    if not samples:
+        return DEFAULT_STAGE_COSTS[stage], False
+    return statistics.median(samples), True
+
+
+def _token_rate(history, kind, default):
+    samples = [
+        entry['llm_tokens'][kind] / entry['video_seconds']
+        for entry in history
+        if entry.get('video_seconds') and entry.get('llm_tokens')
+    ]
+    return statistics.median(samples) if samples else default
+
+
+def transcription_key(options):
+    """Identifies the transcription setup, so timings are compared like for like"""
+    return f"{options.engine or 'default'}:{options.model_size or 'default'}:{'vad' if options.vad else 'full'}"
+
+
+def estimate_job(probe, options, uses_captions):
+    """Predict per-stage processing time and LLM cost for a job"""
+    history = load_history()
+    duration = probe.get('duration') or 0
+    key = transcription_key(options.transcription)
+
+    stages = {}
+    from_history = {}
+    for stage in DEFAULT_STAGE_COSTS:
+        if uses_captions and stage in ('model_load', 'transcribe'):
+            stages[stage] = 0.0
+            continue
+        cost, measured = _stage_cost(history, stage, key)
+        stages[stage] = round(cost * duration if stage in PER_SECOND_STAGES else cost, 1)
+        from_history[stage] = measured
+    if options.tutorial.frame_selection != "vision":
+        stages['matching'] = 0.1
+
+    prompt_tokens = _token_rate(history, 'prompt', DEFAULT_PROMPT_TOKENS_PER_SECOND) * duration
+    completion_tokens = _token_rate(history, 'completion', DEFAULT_COMPLETION_TOKENS_PER_SECOND) * duration
+    cost = (prompt_tokens * LLM_INPUT_PRICE + completion_tokens * LLM_OUTPUT_PRICE) / 1_000_000
+
+    return {
+        'stages': stages,
+        'from_history': from_history,
+        'history_jobs': len(history),
+        'total_seconds': round(sum(stages.values()), 1),
+        'llm_tokens': {'prompt': int(prompt_tokens), 'completion': int(completion_tokens)},
+        'llm_cost_usd': round(cost, 4),
+    }
+
+
+def captions_usable(probe, caption_policy):
+    if caption_policy == 'whisper':
+        return False
+    if probe['manual_captions']:
+        return True
+    return caption_policy == 'auto' and bool(probe['auto_captions'])
+
+
+def admission_check(probe, options, default_caption_policy):
+    """Decide whether to accept, downgrade or reject a job.
+
+    Returns (decision, reasons, options) where ``options`` is the request to
+    run, with cheaper settings applied when the job was downgraded.
+    """
+    reasons = []
+    duration = probe.get('duration') or 0
+    filesize = probe.get('filesize') or 0
+
+    if MAX_VIDEO_DURATION and duration > MAX_VIDEO_DURATION:
+        reasons.append(f"Video is {duration / 60:.0f} minutes long (limit {MAX_VIDEO_DURATION / 60:.0f})")
+    if MAX_FILESIZE and filesize > MAX_FILESIZE:
+        reasons.append(f"Video is {filesize / 1e6:.0f} MB (limit {MAX_FILESIZE / 1e6:.0f} MB)")
+    if reasons:
+        return "reject", reasons, options
+
+    decision = "accept"
+    if DOWNGRADE_DURATION and duration > DOWNGRADE_DURATION:
+        decision = "downgrade"
+        reasons.append(f"Video is longer than {DOWNGRADE_DURATION / 60:.0f} minutes: "
+                       "using captions when available, VAD transcription and transcript-based frame selection")
+        options = options.model_copy(deep=True)
+        options.caption_policy = options.caption_policy if options.caption_policy == 'whisper' else 'auto'
+        options.transcription.vad = True
+        options.tutorial.frame_selection = "transcript"
+
+    if MAX_ESTIMATED_COST:
+        policy = options.caption_policy or default_caption_policy
+        estimate = estimate_job(probe, options, captions_usable(probe, policy))
+        if estimate['llm_cost_usd'] > MAX_ESTIMATED_COST:
+            reasons.append(f"Estimated LLM cost ${estimate['llm_cost_usd']:.2f} is above ${MAX_ESTIMATED_COST:.2f}")
+            return "reject", reasons, options
+
+    return decision, reasons, options
@@ -0,0 +1,87 @@
+"""Self-contained static export of a tutorial as a zip.
+
+The archive holds ``index.html`` with relative image paths, the step images
+(downscaled and re-compressed) under ``images/`` and ``tutorial.json``, so it
+can be unpacked and opened anywhere.
+
+The zip is written entry by entry to the response while it is built, so only
+one image is in memory at a time, and the same bytes go to a cache file. Once
+complete, the cache file is the export of that tutorial version and later
+downloads are served straight from disk.
+"""
+import json
+import os
+import uuid
+import zipfile
+
+EXPORT_IMAGE_MAX_WIDTH = int(os.getenv("EXPORT_IMAGE_MAX_WIDTH", "1280"))
+EXPORT_IMAGE_QUALITY = int(os.getenv("EXPORT_IMAGE_QUALITY", "80"))
+
+
+def export_path(job_dir, version):
+    return f'{job_dir}/output/exports/tutorial-v{version}.zip'
+
+
+def optimize_image(path, max_width=EXPORT_IMAGE_MAX_WIDTH, quality=EXPORT_IMAGE_QUALITY):
+    """JPEG bytes of ``path``, downscaled to ``max_width`` and re-compressed (never larger than the original)"""
+    import cv2
+
+    with open(path, 'rb') as f:
+        original = f.read()
+    image = cv2.imread(path)
+    if image is None:
+        return original
+    height, width = image.shape[:2]
+    if width > max_width:
+        image = cv2.resize(image, (max_width, round(height * max_width / width)), interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes() if ok and len(buffer) < len(original) else original
+
+
+class _StreamSink:
+    """Write-only file object for ZipFile: keeps the bytes for the response and copies them to the cache file"""
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.pending = []
+
+    def write(self, data):
+        self.cache_file.write(data)
+        self.pending.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunk = b"".join(self.pending)
+        self.pending = []
+        return chunk
+
+
+def stream_export(cache_path, html, tutorial_data, images):
+    """Yield the zip archive in chunks while writing it to ``cache_path``.
+
+    ``images`` are (name in the archive, source path) pairs. A download that
+    is interrupted leaves no cache file behind.
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f'{cache_path}.{uuid.uuid4().hex}.tmp'
+    completed = False
+    try:
+        with open(tmp_path, 'wb') as cache_file:
+            sink = _StreamSink(cache_file)
+            with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr('index.html', html)
+                archive.writestr('tutorial.json', json.dumps(tutorial_data, ensure_ascii=False, indent=2))
+                yield sink.drain()
+                for name, path in images:
+                    # JPEG data does not compress further
+                    archive.writestr(name, optimize_image(path), compress_type=zipfile.ZIP_STORED)
+                    yield sink.drain()
+            yield sink.drain()
+        os.replace(tmp_path, cache_path)
+        completed = True
+    finally:
+        if not completed and os.path.exists(tmp_path):
+            os.remove(tmp_path)
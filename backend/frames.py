@@ -0,0 +1,103 @@
+"""Parallel frame extraction by time-sharded decoding.
+
+The sample timestamps (every ``interval`` seconds) are split into contiguous
+shards that are extracted across a process pool. Each worker opens its own
+capture and seeks to its shard's timestamps, so decoding starts from the
+keyframe before each one exactly as in the single-threaded path; results are
+merged back in timestamp order.
+
+``FRAME_EXTRACTION_WORKERS`` sets the worker count, 1 keeps extraction on the
+job thread. By default it is the available cores divided between the jobs the
+scheduler is running.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import numpy as np
+
+from transcription import available_cores
+
+# 0 picks the worker count from the cores and the number of running jobs
+FRAME_EXTRACTION_WORKERS = int(os.getenv("FRAME_EXTRACTION_WORKERS", "0"))
+# Below this many frames per worker, starting processes costs more than it saves
+MIN_FRAMES_PER_WORKER = 8
+# Shards per worker: smaller shards balance uneven seeks and stop sooner on cancel
+SHARDS_PER_WORKER = 2
+
+
+def frame_workers(samples, running_jobs=1, requested=FRAME_EXTRACTION_WORKERS):
+    """Number of processes to extract ``samples`` frames with"""
+    workers = requested or available_cores() // max(1, running_jobs)
+    return max(1, min(workers, samples // MIN_FRAMES_PER_WORKER))
+
+
+def sample_times(video_path, interval):
+    """Timestamps (seconds into the file) to take a frame at"""
+    import cv2
+
+    video = cv2.VideoCapture(video_path)
+    fps = video.get(cv2.CAP_PROP_FPS)
+    duration = video.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+    video.release()
+    return np.arange(0, duration, interval)
+
+
+def _extract_shard(video_path, times, frames_dir, offset):
+    """Worker: extract the frames at ``times``, returns the CPU seconds used and (timestamp, path, JPEG bytes) for each"""
+    import cv2
+
+    # A worker runs one shard at a time, so its process CPU time is this shard's
+    cpu_start = time.process_time()
+    video = cv2.VideoCapture(video_path)
+    frames = []
+    for t in times:
+        video.set(cv2.CAP_PROP_POS_MSEC, t * 1000)
+        ret, frame = video.read()
+        if not ret:
+            continue
+        timestamp = t + offset
+        frame_path = f'{frames_dir}/frame_{timestamp:.2f}.jpg'
+        _, buffer = cv2.imencode('.jpg', frame)
+        jpeg = buffer.tobytes()
+        with open(frame_path, 'wb') as f:
+            f.write(jpeg)
+        frames.append((timestamp, frame_path, jpeg))
+    video.release()
+    return time.process_time() - cpu_start, frames
+
+
+def extract_frames_parallel(video_path, times, frames_dir, offset=0.0, workers=2, should_stop=None, report_cpu=None):
+    """Extract the frames at ``times`` across ``workers`` processes.
+
+    Frames are named and timestamped ``t + offset`` (their position in the
+    original video). Returns (timestamp, path, JPEG bytes) tuples in timestamp
+    order; when ``should_stop`` returns True the remaining shards are
+    cancelled and the frames extracted so far are returned, without waiting
+    for the shards still running. ``report_cpu`` is
+    called with the CPU seconds of each finished shard.
+    """
+    shards = [shard for shard in np.array_split(times, workers * SHARDS_PER_WORKER) if len(shard)]
+    print(f"[Frames] {len(times)} frames in {len(shards)} shards, {workers} workers")
+
+    frames = []
+    # Not a with block: leaving one waits for the running shards, even after a cancel
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    finished = False
+    try:
+        futures = [pool.submit(_extract_shard, video_path, shard.tolist(), frames_dir, offset) for shard in shards]
+        for future in futures:
+            while should_stop and not future.done():
+                if should_stop():
+                    return sorted(frames)
+                wait([future], timeout=1)
+            cpu, shard_frames = future.result()
+            if report_cpu:
+                report_cpu(cpu)
+            frames.extend(shard_frames)
+        finished = True
+    finally:
+        # Stopped or failed: drop the queued shards and leave the running ones to finish on their own
+        pool.shutdown(wait=finished, cancel_futures=not finished)
+    return sorted(frames)
@@ -0,0 +1,135 @@
+"""Pipeline instrumentation: Prometheus metrics and per-job stage timings."""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+import tracing
+
+STAGES = ('download', 'model_load', 'transcribe', 'frame_extraction', 'structuring', 'matching', 'html', 'pdf')
+
+STAGE_DURATION = Histogram(
+    'pipeline_stage_duration_seconds', 'Wall time spent in each pipeline stage', ['stage'],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 3600),
+)
+BYTES_PROCESSED = Counter('pipeline_bytes_processed_total', 'Bytes written by each pipeline stage', ['stage'])
+FRAMES_EXTRACTED = Counter('pipeline_frames_extracted_total', 'Video frames extracted')
+LLM_DURATION = Histogram(
+    'llm_request_duration_seconds', 'OpenAI request latency', ['purpose'],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+LLM_TOKENS = Counter('llm_tokens_total', 'OpenAI tokens used', ['purpose', 'kind'])
+LLM_ERRORS = Counter('llm_errors_total', 'Failed OpenAI requests', ['purpose'])
+JOBS_QUEUED = Gauge('pipeline_jobs_queued', 'Jobs accepted but not started yet')
+JOBS_IN_FLIGHT = Gauge('pipeline_jobs_in_flight', 'Jobs currently running')
+JOBS_DISK_BYTES = Gauge('pipeline_jobs_disk_bytes', 'Disk space used by the jobs directory at the last retention sweep')
+JOBS_COALESCED = Counter('pipeline_jobs_coalesced_total', 'Submissions attached to an identical job in progress')
+# status: completed, error, cancelled, or detached for a cancelled submission whose
+# work goes on for identical submissions (see singleflight)
+JOBS_FINISHED = Counter('pipeline_jobs_finished_total', 'Finished jobs by outcome', ['status'])
+
+# job_id -> {stage: {"wall": seconds, "cpu": seconds}}; "cpu" is the stage thread's own CPU
+# time plus what its worker processes report, never CPU used by other stages or jobs
+job_timings = {}
+_timings_lock = threading.Lock()
+
+# job_id -> {"prompt": tokens, "completion": tokens}
+job_llm_usage = {}
+
+# job_id -> [{"stage", "wall", "queued"}], the stages that bounded the job's latency
+job_critical_paths = {}
+
+
+@contextmanager
+def stage_timer(job_id, stage):
+    """Record the wall and CPU time of one pipeline stage for ``job_id``, and trace it as a span.
+
+    CPU time is measured on the calling thread, as stages of several jobs run
+    side by side in one process; stages that hand work to worker processes
+    add it with ``add_worker_cpu``.
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        with tracing.span(stage, job_id=job_id):
+            yield
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        STAGE_DURATION.labels(stage).observe(wall)
+        with _timings_lock:
+            timing = job_timings.setdefault(job_id, {}).setdefault(stage, {"wall": 0.0, "cpu": 0.0})
+            timing["wall"] = round(timing["wall"] + wall, 3)
+            timing["cpu"] = round(timing["cpu"] + cpu, 3)
+
+
+def add_worker_cpu(job_id, stage, seconds):
+    """Charge CPU time spent in a worker process to one of ``job_id``'s stages"""
+    with _timings_lock:
+        timing = job_timings.setdefault(job_id, {}).setdefault(stage, {"wall": 0.0, "cpu": 0.0})
+        timing["cpu"] = round(timing["cpu"] + seconds, 3)
+
+
+def forget_job(job_id):
+    """Drop the in-memory figures of a job that was evicted or deleted"""
+    with _timings_lock:
+        job_timings.pop(job_id, None)
+        job_llm_usage.pop(job_id, None)
+        job_critical_paths.pop(job_id, None)
+
+
+def record_bytes(stage, path):
+    """Count the size of a file produced by ``stage``"""
+    if path and os.path.exists(path):
+        BYTES_PROCESSED.labels(stage).inc(os.path.getsize(path))
+
+
+def record_llm_call(purpose, elapsed, response=None, job_id=None):
+    LLM_DURATION.labels(purpose).observe(elapsed)
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        tracing.set_attributes(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        LLM_TOKENS.labels(purpose, 'prompt').inc(usage.prompt_tokens or 0)
+        LLM_TOKENS.labels(purpose, 'completion').inc(usage.completion_tokens or 0)
+        if job_id is not None:
+            with _timings_lock:
+                tokens = job_llm_usage.setdefault(job_id, {"prompt": 0, "completion": 0})
+                tokens["prompt"] += usage.prompt_tokens or 0
+                tokens["completion"] += usage.completion_tokens or 0
+
+
+def get_job_timings(job_id):
+    with _timings_lock:
+        return {stage: dict(timing) for stage, timing in job_timings.get(job_id, {}).items()}
+
+
+def record_critical_path(job_id, path):
+    with _timings_lock:
+        job_critical_paths[job_id] = path
+
+
+def get_job_critical_path(job_id):
+    with _timings_lock:
+        return list(job_critical_paths.get(job_id, []))
+
+
+def get_job_llm_usage(job_id):
+    with _timings_lock:
+        return dict(job_llm_usage.get(job_id, {"prompt": 0, "completion": 0}))
+
+
+def save_job_timings(job_id, job_dir):
+    """Persist a job's timing breakdown next to its artifacts"""
+    with open(f'{job_dir}/timings.json', 'w', encoding='utf-8') as f:
+        json.dump(get_job_timings(job_id), f)
+    if job_id in job_critical_paths:
+        with open(f'{job_dir}/critical_path.json', 'w', encoding='utf-8') as f:
+            json.dump(get_job_critical_path(job_id), f)
+
+
+def render_metrics():
+    """Return (body, content type) in the Prometheus text exposition format"""
+    return generate_latest(), CONTENT_TYPE_LATEST
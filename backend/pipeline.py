@@ -0,0 +1,138 @@
+"""Stage graph executor for the per-job pipeline.
+
+Each stage declares the artifacts it reads and writes; the executor starts a
+stage as soon as all of its inputs exist, so independent stages (e.g.
+transcription and frame extraction, or structuring and frame extraction)
+overlap. CPU-bound stages run on one shared thread pool and network-bound
+(LLM) stages on another, so waiting on OpenAI never holds a CPU slot.
+
+Profiled jobs run their stages one after another on the calling thread
+(``inline``), as the profilers only watch that thread.
+
+After a run, ``critical_path`` lists the chain of stages that determined the
+job's total latency: speeding up any other stage would not make it finish
+sooner.
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+CPU_STAGE_WORKERS = int(os.getenv("PIPELINE_CPU_WORKERS", "4"))
+IO_STAGE_WORKERS = int(os.getenv("PIPELINE_IO_WORKERS", "8"))
+
+# Shared by all jobs, so concurrent jobs compete for the same CPU slots
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(kind):
+    with _pools_lock:
+        if kind not in _pools:
+            workers = CPU_STAGE_WORKERS if kind == "cpu" else IO_STAGE_WORKERS
+            _pools[kind] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"stage-{kind}")
+        return _pools[kind]
+
+
+@dataclass
+class Stage:
+    name: str
+    func: callable
+    inputs: tuple = ()
+    outputs: tuple = ()
+    # "cpu" for compute-bound stages, "io" for network-bound ones
+    pool: str = "cpu"
+
+
+class PipelineExecutor:
+    def __init__(self, stages, on_stage_start=None, inline=False):
+        self.stages = {stage.name: stage for stage in stages}
+        self.on_stage_start = on_stage_start
+        self.inline = inline
+        self.producers = {output: stage.name for stage in stages for output in stage.outputs}
+        self.runs = {}
+        self._lock = threading.Lock()
+        self.started_at = None
+
+    def _run_stage(self, stage, artifacts):
+        with self._lock:
+            self.runs[stage.name] = {'started': time.perf_counter()}
+            running = [name for name, run in self.runs.items() if 'finished' not in run]
+        if self.on_stage_start:
+            self.on_stage_start(stage.name, running)
+        result = stage.func(*(artifacts[name] for name in stage.inputs))
+        with self._lock:
+            self.runs[stage.name]['finished'] = time.perf_counter()
+        if len(stage.outputs) == 1:
+            return {stage.outputs[0]: result}
+        return dict(zip(stage.outputs, result or ()))
+
+    def run(self, artifacts):
+        """Run every stage; ``artifacts`` holds the initial inputs and receives all outputs"""
+        artifacts = dict(artifacts)
+        pending = dict(self.stages)
+        running = {}
+        self.started_at = time.perf_counter()
+        error = None
+
+        if self.inline:
+            while pending:
+                name = next((name for name, stage in pending.items()
+                             if all(name_ in artifacts for name_ in stage.inputs)), None)
+                if name is None:
+                    raise RuntimeError(f"Pipeline stages can never start: {', '.join(pending)}")
+                artifacts.update(self._run_stage(pending.pop(name), artifacts))
+            return artifacts
+
+        while pending or running:
+            if error is None:
+                for name, stage in list(pending.items()):
+                    if all(name_ in artifacts for name_ in stage.inputs):
+                        del pending[name]
+                        running[_pool(stage.pool).submit(self._run_stage, stage, artifacts)] = name
+            if not running:
+                if pending and error is None:
+                    raise RuntimeError(f"Pipeline stages can never start: {', '.join(pending)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.pop(future)
+                try:
+                    artifacts.update(future.result())
+                except Exception as e:
+                    # Let the stages already running finish, but start no new ones
+                    if error is None:
+                        error = e
+                    pending.clear()
+
+        if error is not None:
+            raise error
+        return artifacts
+
+    def critical_path(self, target=None):
+        """Chain of stages that bounded the latency of producing ``target`` (default: the last stage to finish)"""
+        finished = {name: run for name, run in self.runs.items() if 'finished' in run}
+        if not finished:
+            return []
+
+        path = []
+        if target is not None:
+            name = self.producers[target] if self.producers.get(target) in finished else None
+        else:
+            name = max(finished, key=lambda stage: finished[stage]['finished'])
+        while name is not None:
+            run = finished[name]
+            # The stage waited on whichever of its inputs was produced last
+            dependencies = {self.producers[i] for i in self.stages[name].inputs if self.producers.get(i) in finished}
+            previous = max(dependencies, key=lambda stage: finished[stage]['finished'], default=None)
+            ready_at = finished[previous]['finished'] if previous else self.started_at
+            path.append({
+                'stage': name,
+                'wall': round(run['finished'] - run['started'], 3),
+                # Time between the inputs being ready and the stage starting (pool queueing)
+                'queued': round(max(0.0, run['started'] - ready_at), 3),
+            })
+            name = previous
+        return list(reversed(path))
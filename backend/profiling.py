@@ -0,0 +1,67 @@
+"""Opt-in per-job profiling.
+
+A profiled job runs under cProfile (deterministic, saved as pstats) while a
+background thread samples the job thread's stack to produce a collapsed-stack
+file that flamegraph.pl, speedscope or inferno can render directly.
+"""
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+
+PROFILE_ARTIFACTS = {
+    'pstats': ('profile.pstats', 'application/octet-stream'),
+    'collapsed': ('profile.collapsed', 'text/plain'),
+}
+
+
+class StackSampler:
+    """Periodically sample one thread's Python stack into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def run_profiled(output_dir, func, *args, **kwargs):
+    """Run ``func`` under both profilers and save the artifacts in ``output_dir``"""
+    os.makedirs(output_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident())
+
+    sampler.start()
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        sampler.stop()
+        profiler.dump_stats(os.path.join(output_dir, PROFILE_ARTIFACTS['pstats'][0]))
+        sampler.write(os.path.join(output_dir, PROFILE_ARTIFACTS['collapsed'][0]))
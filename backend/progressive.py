@@ -0,0 +1,140 @@
+"""Progressive transcription of a video while it is still downloading.
+
+yt-dlp writes the video to a growing ``.part`` file. The download progress
+tells how many seconds of media are (roughly) on disk; every time another
+window of audio is covered, it is decoded straight from the partial file and
+transcribed, so transcription runs alongside the download instead of after
+it. Segment timestamps are shifted by the window start, so they are absolute
+positions in the video.
+
+Containers that cannot be decoded before they are complete (e.g. MP4 with the
+index at the end) just yield no audio yet; those windows wait for the
+download to finish, which degrades to the sequential pipeline.
+"""
+import os
+import subprocess
+import threading
+
+from vad import SAMPLE_RATE, load_audio_range
+
+STREAMING_WINDOW = float(os.getenv("STREAMING_WINDOW", "30"))
+# Seconds of media kept between a window's end and the download position,
+# as the byte-based position estimate is only approximate
+STREAMING_MARGIN = float(os.getenv("STREAMING_MARGIN", "10"))
+
+
+class ProgressiveTranscriber:
+    def __init__(self, transcribe_window, duration, window=STREAMING_WINDOW, margin=STREAMING_MARGIN,
+                 should_stop=None, on_segments=None, on_start=None):
+        """``transcribe_window(audio)`` returns a Whisper-style result for one window of samples.
+
+        ``on_start`` runs first on the transcriber thread (e.g. to load the
+        model while the download is starting).
+        """
+        self.transcribe_window = transcribe_window
+        self.on_start = on_start
+        self.duration = duration
+        self.window = window
+        self.margin = margin
+        self.should_stop = should_stop
+        self.on_segments = on_segments
+        self.segments = []
+        self.language = None
+        self.transcribed_until = 0.0
+        self._path = None
+        self._available = 0.0
+        # Raised after a window could not be decoded, so it is only retried with more data
+        self._required = 0.0
+        self._finished = False
+        self._aborted = False
+        self._error = None
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="progressive-transcriber")
+
+    def start(self):
+        self._thread.start()
+
+    def update(self, path, fraction):
+        """Report download progress: ``path`` is the file being written, ``fraction`` how much is done"""
+        with self._condition:
+            self._path = path
+            self._available = self.duration * fraction
+            self._condition.notify()
+
+    def finish(self, path):
+        """The download is complete and saved at ``path``"""
+        with self._condition:
+            self._path = path
+            self._available = self.duration
+            self._finished = True
+            self._condition.notify()
+
+    def abort(self):
+        with self._condition:
+            self._aborted = True
+            self._condition.notify()
+
+    def _stopped(self):
+        return self._aborted or (self.should_stop is not None and self.should_stop())
+
+    def _wait_for(self, end):
+        """Block until [.., end) is on disk; returns the path to read or None when stopped"""
+        with self._condition:
+            while not (self._finished or self._available >= max(end + self.margin, self._required)):
+                if self._stopped():
+                    return None
+                self._condition.wait(timeout=1)
+            return None if self._stopped() else self._path
+
+    def _decode(self, path, start, end):
+        # The .part file is renamed when the download finishes
+        if not os.path.exists(path) and path.endswith('.part'):
+            path = path[:-len('.part')]
+        try:
+            return load_audio_range(path, start, end - start)
+        except subprocess.CalledProcessError:
+            return None
+
+    def _run(self):
+        start = 0.0
+        try:
+            if self.on_start:
+                self.on_start()
+            while start < self.duration:
+                end = min(start + self.window, self.duration)
+                path = self._wait_for(end)
+                if path is None:
+                    return
+                audio = self._decode(path, start, end)
+                # A window that is not decodable yet (or came up short) is retried with more data
+                if not self._finished and (audio is None or len(audio) < (end - start) * SAMPLE_RATE * 0.9):
+                    with self._condition:
+                        self._required = self._available + self.window
+                    continue
+                if audio is not None and len(audio):
+                    result = self.transcribe_window(audio)
+                    self.language = self.language or result.get('language')
+                    new_segments = [
+                        {**seg, 'start': seg['start'] + start, 'end': min(seg['end'] + start, end)}
+                        for seg in result['segments']
+                    ]
+                    self.segments.extend(new_segments)
+                    if self.on_segments:
+                        self.on_segments(new_segments, end)
+                self.transcribed_until = end
+                start = end
+        except Exception as e:
+            self._error = e
+
+    def result(self):
+        """Wait for the remaining windows and return the full transcription result"""
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        for idx, seg in enumerate(self.segments):
+            seg['id'] = idx
+        return {
+            'text': "".join(seg['text'] for seg in self.segments),
+            'segments': self.segments,
+            'language': self.language,
+        }
@@ -0,0 +1,197 @@
+"""Disk budget and artifact retention for the jobs directory.
+
+Artifacts are dropped as soon as nothing needs them any more:
+
+- the downloaded video, once the transcript and frames are extracted
+- frames that no tutorial version uses, once a completed job has been idle
+  for ``PRUNE_FRAMES_AFTER_HOURS``
+- whole jobs, least recently used first, while the jobs directory is over
+  ``JOBS_DISK_BUDGET_GB``
+
+A background thread runs the sweep periodically and whenever a job finishes,
+so requests never wait for cleanup.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+
+import metrics
+
+DELETE_SOURCE_VIDEO = os.getenv("DELETE_SOURCE_VIDEO", "true").lower() in ("1", "true", "yes")
+# 0 prunes unused frames at the first sweep after completion, a negative value never prunes
+PRUNE_FRAMES_AFTER_HOURS = float(os.getenv("PRUNE_FRAMES_AFTER_HOURS", "24"))
+# 0 disables LRU eviction
+JOBS_DISK_BUDGET_GB = float(os.getenv("JOBS_DISK_BUDGET_GB", "10"))
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "600"))
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def job_usage(job_dir):
+    """Bytes used by a job, split by artifact type"""
+    usage = {'video': 0, 'frames': 0, 'transcript': 0, 'output': 0, 'other': 0}
+    if not os.path.isdir(job_dir):
+        return usage
+    for entry in os.scandir(job_dir):
+        if entry.is_dir():
+            kind = entry.name if entry.name in ('frames', 'output') else 'other'
+            usage[kind] += directory_size(entry.path)
+            continue
+        if entry.name.startswith('downloaded_video'):
+            kind = 'video'
+        elif entry.name.startswith(('transcript', 'transcription_result')):
+            kind = 'transcript'
+        else:
+            kind = 'other'
+        usage[kind] += entry.stat().st_size
+    return usage
+
+
+def remove_source_video(video_path):
+    """Delete a job's downloaded video once it is no longer needed"""
+    if DELETE_SOURCE_VIDEO and video_path and os.path.exists(video_path):
+        os.remove(video_path)
+        print(f"[Retention] Removed source video {video_path}")
+
+
+def used_frames(job_dir):
+    """Frame paths referenced by the current tutorial or any saved version"""
+    paths = [f'{job_dir}/output/tutorial.json']
+    versions_dir = f'{job_dir}/output/versions'
+    if os.path.isdir(versions_dir):
+        paths += [f'{versions_dir}/{version}/tutorial.json' for version in os.listdir(versions_dir)]
+    used = set()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                used.update(os.path.basename(step['frame']) for step in json.load(f).get('steps', []))
+    return used
+
+
+def prune_frames(job_dir):
+    """Delete the frames no tutorial step uses, returns the bytes freed"""
+    frames_dir = f'{job_dir}/frames'
+    if not os.path.isdir(frames_dir) or not os.path.exists(f'{job_dir}/output/tutorial.json'):
+        return 0
+    keep = used_frames(job_dir)
+    freed = 0
+    for entry in os.scandir(frames_dir):
+        if entry.name not in keep:
+            freed += entry.stat().st_size
+            os.remove(entry.path)
+    return freed
+
+
+class RetentionManager:
+    def __init__(self, jobs_dir="jobs", budget_gb=JOBS_DISK_BUDGET_GB,
+                 prune_after_hours=PRUNE_FRAMES_AFTER_HOURS, interval=RETENTION_INTERVAL):
+        self.jobs_dir = jobs_dir
+        self.budget = int(budget_gb * 1024 ** 3)
+        self.prune_after = prune_after_hours * 3600
+        self.interval = interval
+        # job_id -> time of the last request that used the job's artifacts
+        self.last_access = {}
+        self.last_sweep = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def touch(self, job_id):
+        self.last_access[job_id] = time.time()
+
+    def _last_used(self, job_id):
+        if job_id in self.last_access:
+            return self.last_access[job_id]
+        try:
+            return os.path.getmtime(f'{self.jobs_dir}/{job_id}')
+        except OSError:
+            return 0.0
+
+    def _job_ids(self):
+        if not os.path.isdir(self.jobs_dir):
+            return []
+        return [entry.name for entry in os.scandir(self.jobs_dir) if entry.is_dir()]
+
+    def usage(self):
+        """Disk usage report for the jobs directory"""
+        jobs = {job_id: job_usage(f'{self.jobs_dir}/{job_id}') for job_id in self._job_ids()}
+        by_artifact = {}
+        for usage in jobs.values():
+            for kind, size in usage.items():
+                by_artifact[kind] = by_artifact.get(kind, 0) + size
+        totals = {job_id: sum(usage.values()) for job_id, usage in jobs.items()}
+        used = sum(totals.values())
+        largest = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            'used_bytes': used,
+            'budget_bytes': self.budget or None,
+            'used_fraction': round(used / self.budget, 3) if self.budget else None,
+            'jobs': len(jobs),
+            'by_artifact': by_artifact,
+            'largest_jobs': [{'job_id': job_id, 'bytes': size} for job_id, size in largest],
+            'last_sweep': self.last_sweep,
+        }
+
+    def sweep(self, is_busy, is_completed, on_evict):
+        """Prune idle jobs' frames, then evict least recently used jobs while over budget"""
+        with self._lock:
+            now = time.time()
+            job_ids = [job_id for job_id in self._job_ids() if not is_busy(job_id)]
+
+            if self.prune_after >= 0:
+                for job_id in job_ids:
+                    if is_completed(job_id) and now - self._last_used(job_id) >= self.prune_after:
+                        freed = prune_frames(f'{self.jobs_dir}/{job_id}')
+                        if freed:
+                            print(f"[Retention] Pruned {freed / 1e6:.1f} MB of unused frames from job {job_id}")
+
+            sizes = {job_id: directory_size(f'{self.jobs_dir}/{job_id}') for job_id in self._job_ids()}
+            used = sum(sizes.values())
+            evicted = []
+            if self.budget:
+                for job_id in sorted(job_ids, key=self._last_used):
+                    if used <= self.budget:
+                        break
+                    shutil.rmtree(f'{self.jobs_dir}/{job_id}', ignore_errors=True)
+                    used -= sizes.get(job_id, 0)
+                    self.last_access.pop(job_id, None)
+                    evicted.append(job_id)
+                    on_evict(job_id)
+                if evicted:
+                    print(f"[Retention] Evicted {len(evicted)} jobs, {used / 1e9:.2f} GB in use")
+
+            metrics.JOBS_DISK_BYTES.set(used)
+            self.last_sweep = now
+            return evicted
+
+    def request_sweep(self):
+        """Run a sweep soon, without waiting for it"""
+        self._wake.set()
+
+    def start(self, is_busy, is_completed, on_evict):
+        if self._thread is not None:
+            return
+
+        def run():
+            while True:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                try:
+                    self.sweep(is_busy, is_completed, on_evict)
+                except Exception as e:
+                    print(f"[Retention] Sweep failed: {e}")
+
+        self._thread = threading.Thread(target=run, daemon=True, name="retention")
+        self._thread.start()
+        self.request_sweep()
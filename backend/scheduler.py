@@ -0,0 +1,154 @@
+"""Queue for pipeline jobs with pluggable scheduling policies.
+
+A fixed number of worker threads take queued jobs in the order chosen by the
+policy, using each job's video duration (from the pre-flight metadata probe):
+
+    fifo  submission order
+    sjf   shortest video first; waiting jobs age, so long videos still start
+    fair  the client that has had the least video time processed goes first,
+          shortest job first within a client
+"""
+import os
+import threading
+import time
+
+SCHEDULING_POLICIES = ('fifo', 'sjf', 'fair')
+DEFAULT_POLICY = os.getenv("SCHEDULING_POLICY", "sjf")
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
+# Seconds of video a queued job is credited for every second it waits (sjf and fair)
+AGING_RATE = float(os.getenv("JOB_AGING_RATE", "5"))
+# Assumed length of videos whose duration is unknown
+UNKNOWN_DURATION = 600.0
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job at its next cancellation check"""
+
+
+class JobScheduler:
+    def __init__(self, policy=DEFAULT_POLICY, workers=MAX_CONCURRENT_JOBS, aging_rate=AGING_RATE):
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+        self.policy = policy
+        self.workers = workers
+        self.aging_rate = aging_rate
+        self.queued = {}
+        self.running = {}
+        # Video seconds started per client, the fair-share "virtual time"
+        self.client_usage = {}
+        self.cancelled = set()
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._threads = []
+
+    def start(self):
+        with self._condition:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._worker, daemon=True, name=f"job-worker-{len(self._threads)}")
+                self._threads.append(thread)
+                thread.start()
+
+    def submit(self, job_id, func, *args, video_seconds=None, client_id="anonymous"):
+        with self._condition:
+            if not self._has_backlog(client_id):
+                # An idle client rejoins at the current virtual time instead of
+                # cashing in the time it was away
+                backlogged = [usage for client, usage in self.client_usage.items() if self._has_backlog(client)]
+                self.client_usage[client_id] = max(self.client_usage.get(client_id, 0.0), min(backlogged, default=0.0))
+            self._sequence += 1
+            self.queued[job_id] = {
+                'func': func,
+                'args': args,
+                'video_seconds': video_seconds,
+                'client_id': client_id,
+                'submitted_at': time.time(),
+                'sequence': self._sequence,
+            }
+            self._condition.notify()
+        self.start()
+
+    def _has_backlog(self, client_id):
+        return any(job['client_id'] == client_id for job in (*self.queued.values(), *self.running.values()))
+
+    def _score(self, job, now):
+        if self.policy == 'fifo':
+            return (job['sequence'],)
+        duration = job['video_seconds'] if job['video_seconds'] is not None else UNKNOWN_DURATION
+        aged = duration - self.aging_rate * (now - job['submitted_at'])
+        if self.policy == 'fair':
+            return (self.client_usage.get(job['client_id'], 0.0), aged, job['sequence'])
+        return (aged, job['sequence'])
+
+    def _ordered(self):
+        now = time.time()
+        return sorted(self.queued, key=lambda job_id: self._score(self.queued[job_id], now))
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self.queued:
+                    self._condition.wait()
+                job_id = self._ordered()[0]
+                job = self.queued.pop(job_id)
+                job['started_at'] = time.time()
+                self.running[job_id] = job
+                duration = job['video_seconds'] if job['video_seconds'] is not None else UNKNOWN_DURATION
+                self.client_usage[job['client_id']] = self.client_usage.get(job['client_id'], 0.0) + duration
+            try:
+                job['func'](*job['args'])
+            except Exception as e:
+                print(f"Job {job_id} failed in scheduler: {e}")
+            finally:
+                with self._condition:
+                    self.running.pop(job_id, None)
+                    self.cancelled.discard(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a job: queued jobs are dropped, running jobs are flagged.
+
+        Returns "queued" or "running" for the state the job was cancelled in,
+        or None if the scheduler does not know the job.
+        """
+        with self._condition:
+            if self.queued.pop(job_id, None) is not None:
+                return "queued"
+            if job_id in self.running:
+                self.cancelled.add(job_id)
+                return "running"
+            return None
+
+    def running_jobs(self):
+        with self._condition:
+            return len(self.running)
+
+    def is_cancelled(self, job_id):
+        return job_id in self.cancelled
+
+    def check_cancelled(self, job_id):
+        if job_id in self.cancelled:
+            raise JobCancelled(f"Job {job_id} was cancelled")
+
+    def describe(self, job_id):
+        """Scheduling details of a queued or running job, for /status"""
+        with self._condition:
+            if job_id in self.queued:
+                job = self.queued[job_id]
+                position = self._ordered().index(job_id) + 1
+                state = "queued"
+            elif job_id in self.running:
+                job = self.running[job_id]
+                position = 0
+                state = "running"
+            else:
+                return None
+            return {
+                'policy': self.policy,
+                'state': state,
+                'queue_position': position,
+                'queue_length': len(self.queued),
+                'score': [round(value, 1) for value in self._score(job, job.get('started_at', time.time()))],
+                'video_seconds': job['video_seconds'],
+                'client_id': job['client_id'],
+                'waited': round(job.get('started_at', time.time()) - job['submitted_at'], 1),
+                'cancel_requested': job_id in self.cancelled,
+            }
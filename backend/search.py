@@ -0,0 +1,177 @@
+"""Full-text search across processed tutorials.
+
+A SQLite FTS5 index (``jobs/search.db``) holds each completed tutorial's
+title, introduction, step titles and explanations, and transcript segments.
+A job is (re)indexed when it completes or is regenerated and removed when
+retention evicts it, so the index never needs a full rebuild; jobs finished
+before the index existed are added at startup.
+
+Queries are matched word by word (the last word as a prefix) with BM25
+ranking, and results are grouped per tutorial with the matching steps and
+transcript timestamps.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+SEARCH_DB_PATH = os.getenv("SEARCH_DB_PATH", "jobs/search.db")
+# Matching rows considered per query before grouping them into tutorials
+MAX_SEARCH_HITS = 500
+# Title and step matches rank above a passing mention in the transcript
+KIND_WEIGHTS = {'title': 3.0, 'introduction': 1.5, 'step': 2.0, 'segment': 1.0}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tutorials (
+    job_id TEXT PRIMARY KEY,
+    title TEXT,
+    youtube_url TEXT,
+    steps INTEGER,
+    indexed_at REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(
+    text,
+    job_id UNINDEXED,
+    kind UNINDEXED,
+    step_number UNINDEXED,
+    timestamp UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+"""
+
+
+def match_expression(query):
+    """FTS5 query for free text: every word must match, the last one as a prefix"""
+    words = [word.replace('"', '""') for word in query.split()]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+class SearchIndex:
+    def __init__(self, path=SEARCH_DB_PATH):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        # One connection per call: requests and job threads search and index concurrently
+        connection = sqlite3.connect(self.path, timeout=30)
+        # WAL is durable across crashes without an fsync on every commit
+        connection.execute("PRAGMA synchronous=NORMAL")
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._initialized = True
+        return connection
+
+    def index_job(self, job_id, tutorial_data, transcript=(), youtube_url=None):
+        """Replace a job's documents with its current tutorial and transcript"""
+        rows = [(tutorial_data.get('title') or '', 'title', None, None)]
+        if tutorial_data.get('introduction'):
+            rows.append((tutorial_data['introduction'], 'introduction', None, None))
+        for step in tutorial_data.get('steps', []):
+            rows.append((f"{step.get('title', '')}\n{step.get('explanation', '')}", 'step',
+                         step.get('step_number'), step.get('timestamp')))
+        for segment in transcript:
+            rows.append((segment['text'], 'segment', None, segment['start']))
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._write_lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.execute("DELETE FROM documents WHERE job_id = ?", (job_id,))
+                    connection.executemany(
+                        "INSERT INTO documents (text, job_id, kind, step_number, timestamp) VALUES (?, ?, ?, ?, ?)",
+                        [(text, job_id, kind, step_number, timestamp) for text, kind, step_number, timestamp in rows],
+                    )
+                    connection.execute(
+                        "INSERT OR REPLACE INTO tutorials (job_id, title, youtube_url, steps, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                        (job_id, tutorial_data.get('title'), youtube_url, len(tutorial_data.get('steps', [])), time.time()),
+                    )
+            finally:
+                connection.close()
+
+    def remove_job(self, job_id):
+        if not os.path.exists(self.path):
+            return
+        with self._write_lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.execute("DELETE FROM documents WHERE job_id = ?", (job_id,))
+                    connection.execute("DELETE FROM tutorials WHERE job_id = ?", (job_id,))
+            finally:
+                connection.close()
+
+    def indexed_jobs(self):
+        if not os.path.exists(self.path):
+            return set()
+        connection = self._connect()
+        try:
+            return {row[0] for row in connection.execute("SELECT job_id FROM tutorials")}
+        finally:
+            connection.close()
+
+    def search(self, query, limit=20):
+        """Tutorials matching ``query``, best first, each with its matching steps and timestamps"""
+        expression = match_expression(query)
+        if expression is None or not os.path.exists(self.path):
+            return []
+        connection = self._connect()
+        try:
+            # Rank first and build snippets only for the rows that are returned:
+            # snippet() on every matching row is what makes common words slow
+            hits = connection.execute(
+                """
+                SELECT rowid, job_id, kind, step_number, timestamp, bm25(documents)
+                FROM documents
+                WHERE documents MATCH ?
+                ORDER BY bm25(documents)
+                LIMIT ?
+                """,
+                (expression, MAX_SEARCH_HITS),
+            ).fetchall()
+
+            results = {}
+            for rowid, job_id, kind, step_number, timestamp, rank in hits:
+                result = results.setdefault(job_id, {
+                    'job_id': job_id, 'title': None, 'youtube_url': None, 'score': 0.0, 'matches': [],
+                })
+                # bm25() is lower for better matches
+                result['score'] += -rank * KIND_WEIGHTS[kind]
+                if kind in ('step', 'segment'):
+                    result['matches'].append({
+                        'rowid': rowid, 'kind': kind, 'step_number': step_number, 'timestamp': timestamp,
+                    })
+            ranked = sorted(results.values(), key=lambda result: result['score'], reverse=True)[:limit]
+
+            job_ids = [result['job_id'] for result in ranked]
+            rowids = [match['rowid'] for result in ranked for match in result['matches']]
+            tutorials = {row[0]: row[1:] for row in connection.execute(
+                f"SELECT job_id, title, youtube_url FROM tutorials WHERE job_id IN ({','.join('?' * len(job_ids))})",
+                job_ids,
+            )}
+            snippets = dict(connection.execute(
+                f"""
+                SELECT rowid, snippet(documents, 0, '[', ']', '…', 12)
+                FROM documents
+                WHERE documents MATCH ? AND rowid IN ({','.join('?' * len(rowids))})
+                """,
+                [expression, *rowids],
+            )) if rowids else {}
+        finally:
+            connection.close()
+
+        # Tutorials removed while the query ran have no metadata left
+        ranked = [result for result in ranked if result['job_id'] in tutorials]
+        for result in ranked:
+            result['title'], result['youtube_url'] = tutorials[result['job_id']]
+            result['score'] = round(result['score'], 3)
+            for match in result['matches']:
+                match['snippet'] = snippets.get(match.pop('rowid'))
+            result['matches'].sort(key=lambda match: match['timestamp'] if match['timestamp'] is not None else 0)
+        return ranked
@@ -0,0 +1,76 @@
+"""Single-flight coalescing of identical submissions.
+
+While a job is queued or running, another submission of the same video (by
+YouTube video ID, so different URL forms match) with the same options does
+not start a second job. It gets its own job ID that follows the first one:
+its status and results are the leader's.
+
+Cancelling a follower only detaches it. Cancelling the leader stops the work
+only when no follower still waits for it; otherwise just the leader's own
+submission reports "cancelled".
+"""
+import json
+import threading
+
+from batches import video_id
+
+
+def flight_key(request):
+    """Jobs with equal keys do identical work"""
+    options = request.model_dump(exclude={'youtube_url'})
+    return f"{video_id(request.youtube_url)}:{json.dumps(options, sort_keys=True)}"
+
+
+class SingleFlight:
+    def __init__(self):
+        # key -> job doing the work, while it is queued or running
+        self.leaders = {}
+        self.keys = {}
+        # follower job -> leader job
+        self.followers = {}
+        # Leaders whose own submission was cancelled while followers kept the work going
+        self.detached = set()
+        self._lock = threading.Lock()
+
+    def join(self, key, job_id):
+        """Register a submission; returns the leader it follows, or None when it does the work itself"""
+        with self._lock:
+            leader = self.leaders.get(key)
+            if leader is not None:
+                self.followers[job_id] = leader
+                return leader
+            self.leaders[key] = job_id
+            self.keys[job_id] = key
+            return None
+
+    def follow(self, job_id, leader):
+        """Re-attach a follower restored from its checkpoint"""
+        with self._lock:
+            self.followers[job_id] = leader
+
+    def leader_of(self, job_id):
+        return self.followers.get(job_id, job_id)
+
+    def leave(self, job_id):
+        """Detach a submission from the shared work.
+
+        Returns the leader when nobody waits for its work any more (so it
+        should be cancelled), otherwise None.
+        """
+        with self._lock:
+            leader = self.followers.pop(job_id, None)
+            if leader is None:
+                leader = job_id
+                self.detached.add(job_id)
+            waiting = leader not in self.detached or any(l == leader for l in self.followers.values())
+            if waiting:
+                return None
+            self.detached.discard(leader)
+            return leader
+
+    def finish(self, leader):
+        """The leader's work ended: later submissions start a new job"""
+        with self._lock:
+            key = self.keys.pop(leader, None)
+            if key is not None and self.leaders.get(key) == leader:
+                del self.leaders[key]
@@ -0,0 +1,325 @@
+"""Per-job tracing.
+
+Each job is one trace and its trace ID is the job ID (a UUID is exactly the
+128 bits of an OpenTelemetry trace ID), so a job's trace can be found in any
+tracing backend by its job ID. Spans cover the ``/process`` request, the job
+itself, every pipeline stage timed by ``metrics.stage_timer`` (so downloads,
+transcription, frame extraction, structuring, matching, HTML and PDF
+rendering), each OpenAI request with its token counts, and regenerations.
+
+Spans are saved to ``jobs/{job_id}/trace.json`` whenever a top-level span
+ends. They stay in memory only while some span of the job is open; after
+that, ``/jobs/{job_id}/trace`` reads them from the file. With
+``TRACE_EXPORTER`` set they are also exported through the OpenTelemetry SDK,
+an optional dependency: ``file`` appends them as JSON lines to ``TRACE_FILE``,
+``otlp`` sends them to the collector at ``OTEL_EXPORTER_OTLP_ENDPOINT``.
+
+A span's parent is the span open around it in the same thread (or asyncio
+task); spans started on other threads, such as pipeline stages, hang off the
+job's span while it runs.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# "" (keep traces in the API only), "file" or "otlp"
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "jobs/traces.jsonl")
+SERVICE_NAME = "youtube-to-tutorial"
+
+_current_span = ContextVar("current_span", default=None)
+# Trace ID handed to OpenTelemetry for the span being started without a parent
+_root_trace_id = ContextVar("root_trace_id", default=None)
+
+_otel = {"tracer": None, "provider": None, "disabled": not TRACE_EXPORTER}
+_otel_lock = threading.Lock()
+
+
+def trace_id_for(job_id):
+    try:
+        return uuid.UUID(job_id).hex
+    except ValueError:
+        return uuid.uuid5(uuid.NAMESPACE_URL, job_id).hex
+
+
+def _otel_tracer():
+    """OpenTelemetry tracer for the configured exporter, None when export is off or unavailable"""
+    if _otel["disabled"]:
+        return None
+    with _otel_lock:
+        if _otel["tracer"] is None and not _otel["disabled"]:
+            try:
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+                from opentelemetry.sdk.trace.id_generator import RandomIdGenerator
+
+                if TRACE_EXPORTER == "otlp":
+                    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                    exporter = OTLPSpanExporter()
+                else:
+                    os.makedirs(os.path.dirname(TRACE_FILE) or '.', exist_ok=True)
+                    exporter = ConsoleSpanExporter(out=open(TRACE_FILE, 'a', encoding='utf-8'),
+                                                   formatter=lambda span: span.to_json(indent=None) + "\n")
+
+                class JobIdGenerator(RandomIdGenerator):
+                    # Top-level spans belong to their job's trace rather than a new random one
+                    def generate_trace_id(self):
+                        trace_id = _root_trace_id.get()
+                        return int(trace_id, 16) if trace_id else super().generate_trace_id()
+
+                provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}),
+                                          id_generator=JobIdGenerator())
+                provider.add_span_processor(BatchSpanProcessor(exporter))
+                _otel.update(provider=provider, tracer=provider.get_tracer(__name__))
+                print(f"[Tracing] Exporting spans with OpenTelemetry ({TRACE_EXPORTER})")
+            except ImportError as e:
+                print(f"[Tracing] OpenTelemetry export disabled, install opentelemetry-sdk to enable it: {e}")
+                _otel["disabled"] = True
+        return _otel["tracer"]
+
+
+def shutdown():
+    """Flush the spans still waiting to be exported"""
+    if _otel["provider"] is not None:
+        _otel["provider"].shutdown()
+
+
+class Span:
+    def __init__(self, job_id, name, parent, attributes):
+        self.job_id = job_id
+        self.name = name
+        self.parent = parent
+        self.attributes = {key: value for key, value in attributes.items() if value is not None}
+        self.start = time.time()
+        self.end = None
+        self.status = "ok"
+        self.error = None
+        self.otel = None
+        tracer = _otel_tracer()
+        if tracer is not None:
+            from opentelemetry import trace as otel_trace
+
+            context = None
+            token = None
+            if parent is not None and parent.otel is not None:
+                context = otel_trace.set_span_in_context(parent.otel)
+            else:
+                token = _root_trace_id.set(trace_id_for(job_id))
+            try:
+                self.otel = tracer.start_span(name, context=context, attributes=self.attributes,
+                                              start_time=int(self.start * 1e9))
+            finally:
+                if token is not None:
+                    _root_trace_id.reset(token)
+        self.span_id = format(self.otel.get_span_context().span_id, '016x') if self.otel else os.urandom(8).hex()
+
+    def set(self, **attributes):
+        attributes = {key: value for key, value in attributes.items() if value is not None}
+        self.attributes.update(attributes)
+        if self.otel is not None:
+            self.otel.set_attributes(attributes)
+
+    def finish(self, error=None):
+        self.end = time.time()
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+        if self.otel is not None:
+            from opentelemetry.trace import Status, StatusCode
+
+            if error is not None:
+                self.otel.set_status(Status(StatusCode.ERROR, self.error))
+            self.otel.end(end_time=int(self.end * 1e9))
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent else None,
+            'start': self.start,
+            'end': self.end,
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+
+class JobTrace:
+    """The spans recorded for one job, including those of earlier runs loaded from disk"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.trace_id = trace_id_for(job_id)
+        self.path = f"jobs/{job_id}/trace.json"
+        self.spans = []
+        self.saved = []
+        # Job spans currently open: the parent of spans started on other threads
+        self.job_spans = []
+        # Spans opened and not yet ended, guarded by _traces_lock
+        self.open_spans = 0
+        self.lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.saved = json.load(f)['spans']
+
+    def records(self):
+        with self.lock:
+            return self.saved + [span.to_dict() for span in self.spans]
+
+    def save(self):
+        if not os.path.isdir(os.path.dirname(self.path)):
+            # The job's files were deleted
+            return
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'trace_id': self.trace_id, 'spans': self.records()}, f)
+        os.replace(tmp_path, self.path)
+
+
+_traces = {}
+_traces_lock = threading.Lock()
+
+
+def _acquire(job_id):
+    """The trace of a job that a span is opened in"""
+    with _traces_lock:
+        if job_id not in _traces:
+            _traces[job_id] = JobTrace(job_id)
+        trace = _traces[job_id]
+        trace.open_spans += 1
+        return trace
+
+
+def _release(trace):
+    """A span of ``trace`` ended; saves and drops the trace when it was the last one open.
+
+    Returns True when the trace was saved.
+    """
+    with _traces_lock:
+        trace.open_spans -= 1
+        if trace.open_spans or _traces.get(trace.job_id) is not trace:
+            return False
+        # Saved before it is dropped, so a span opened next loads every span from the file
+        trace.save()
+        del _traces[trace.job_id]
+        return True
+
+
+def forget(job_id):
+    with _traces_lock:
+        _traces.pop(job_id, None)
+
+
+class _NoSpan:
+    """Stands in for a span outside of any job"""
+
+    def set(self, **attributes):
+        pass
+
+
+@contextmanager
+def _open(job_id, name, attributes, job_span=False):
+    current = _current_span.get()
+    if job_id is None:
+        if current is None:
+            yield _NoSpan()
+            return
+        job_id = current.job_id
+    trace = _acquire(job_id)
+    if job_span:
+        parent = None
+    elif current is not None and current.job_id == job_id:
+        parent = current
+    else:
+        with trace.lock:
+            parent = trace.job_spans[-1] if trace.job_spans else None
+
+    span = Span(job_id, name, parent, attributes)
+    with trace.lock:
+        trace.spans.append(span)
+        if job_span:
+            trace.job_spans.append(span)
+    token = _current_span.set(span)
+    error = None
+    try:
+        yield span
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        span.finish(error)
+        if job_span:
+            with trace.lock:
+                trace.job_spans.remove(span)
+        if not _release(trace) and parent is None:
+            trace.save()
+
+
+def span(name, job_id=None, **attributes):
+    """Trace a block as a span of ``job_id``'s trace (default: the trace of the enclosing span)"""
+    return _open(job_id, name, attributes)
+
+
+def job_span(job_id, **attributes):
+    """Trace one run of a job; spans started on other threads while it is open become its children"""
+    return _open(job_id, "job", attributes, job_span=True)
+
+
+def set_attributes(**attributes):
+    """Add attributes to the innermost open span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def waterfall(job_id):
+    """Spans of a job's trace in start order, with their depth and offset from the start of the trace"""
+    with _traces_lock:
+        trace = _traces.get(job_id)
+    if trace is None:
+        if not os.path.exists(f"jobs/{job_id}/trace.json"):
+            return None
+        # A finished job: read its spans without keeping them in memory
+        trace = JobTrace(job_id)
+    records = sorted(trace.records(), key=lambda record: record['start'])
+    if not records:
+        return None
+
+    now = time.time()
+    started_at = records[0]['start']
+    depths = {}
+    spans, totals = [], {}
+    for record in records:
+        depth = depths[record['parent_id']] + 1 if record['parent_id'] in depths else 0
+        depths[record['span_id']] = depth
+        duration = (record['end'] or now) - record['start']
+        spans.append({
+            'name': record['name'],
+            'span_id': record['span_id'],
+            'parent_id': record['parent_id'],
+            'depth': depth,
+            'offset': round(record['start'] - started_at, 3),
+            'duration': round(duration, 3),
+            'status': record['status'] if record['end'] else "running",
+            'error': record['error'],
+            'attributes': record['attributes'],
+        })
+        total = totals.setdefault(record['name'], {'count': 0, 'seconds': 0.0})
+        total['count'] += 1
+        total['seconds'] = round(total['seconds'] + duration, 3)
+
+    return {
+        'job_id': job_id,
+        'trace_id': trace.trace_id,
+        'started_at': started_at,
+        'duration': round(max((record['end'] or now) for record in records) - started_at, 3),
+        # Where the time went, by span name, largest first
+        'totals': dict(sorted(totals.items(), key=lambda item: item[1]['seconds'], reverse=True)),
+        'spans': spans,
+    }
@@ -0,0 +1,122 @@
+"""Compact columnar transcript artifact.
+
+Only the columns the pipeline reads (segment start, end and text) are kept.
+The file is laid out as::
+
+    header   magic, segment count, metadata length, text length
+    metadata UTF-8 JSON (language, source)
+    starts   float64[count]
+    ends     float64[count]
+    offsets  uint64[count + 1], byte offsets into the text blob
+    text     UTF-8 text of all segments, concatenated
+
+The numeric columns and the text blob are memory-mapped on load, so opening a
+cached transcript is O(1) and segment text is only decoded when accessed.
+"""
+import json
+import os
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+
+MAGIC = b'YTTRANS1'
+_HEADER = struct.Struct('<8sIIQ')
+_ALIGN = 8
+
+
+def _padding(position):
+    return (-position) % _ALIGN
+
+
+def write_transcript(path, result):
+    """Write the segments of a transcription result to ``path``"""
+    segments = result['segments']
+    encoded = [seg['text'].encode('utf-8') for seg in segments]
+    offsets = np.zeros(len(segments) + 1, dtype=np.uint64)
+    np.cumsum([len(text) for text in encoded], out=offsets[1:])
+
+    meta = json.dumps({
+        'language': result.get('language'),
+        'source': result.get('source', 'whisper'),
+    }).encode('utf-8')
+
+    # Write-then-rename: an existing transcript file is always complete
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(segments), len(meta), int(offsets[-1])))
+        f.write(meta)
+        f.write(b'\0' * _padding(_HEADER.size + len(meta)))
+        f.write(np.array([seg['start'] for seg in segments], dtype=np.float64).tobytes())
+        f.write(np.array([seg['end'] for seg in segments], dtype=np.float64).tobytes())
+        f.write(offsets.tobytes())
+        f.write(b''.join(encoded))
+    os.replace(tmp_path, path)
+
+
+class Transcript(Sequence):
+    """Read-only, lazily decoded view of a transcript file.
+
+    Behaves like the list of segment dicts in a Whisper result, so it can be
+    passed anywhere ``result['segments']`` was used.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            magic, count, meta_len, text_len = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a transcript file: {path}")
+            self.meta = json.loads(f.read(meta_len).decode('utf-8'))
+
+        position = _HEADER.size + meta_len
+        position += _padding(position)
+        self.starts = np.memmap(path, dtype=np.float64, mode='r', offset=position, shape=(count,)) if count else np.zeros(0)
+        position += 8 * count
+        self.ends = np.memmap(path, dtype=np.float64, mode='r', offset=position, shape=(count,)) if count else np.zeros(0)
+        position += 8 * count
+        self._offsets = np.memmap(path, dtype=np.uint64, mode='r', offset=position, shape=(count + 1,))
+        position += 8 * (count + 1)
+        self._text = np.memmap(path, dtype=np.uint8, mode='r', offset=position, shape=(text_len,)) if text_len else b''
+        self._count = count
+
+    @property
+    def language(self):
+        return self.meta.get('language')
+
+    @property
+    def source(self):
+        return self.meta.get('source')
+
+    def text_at(self, index):
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return bytes(self._text[start:end]).decode('utf-8')
+
+    def full_text(self, separator=" "):
+        return separator.join(self.text_at(idx) for idx in range(self._count))
+
+    def between(self, start, end):
+        """Indices of segments that overlap [start, end) seconds"""
+        first = int(np.searchsorted(self.ends, start, side='right'))
+        last = int(np.searchsorted(self.starts, end, side='left'))
+        return range(first, max(first, last))
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[idx] for idx in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("segment index out of range")
+        return {
+            'id': index,
+            'start': float(self.starts[index]),
+            'end': float(self.ends[index]),
+            'text': self.text_at(index),
+        }
+
+
+def load_transcript(path):
+    return Transcript(path)
@@ -0,0 +1,262 @@
+"""Pluggable transcription engines for the tutorial pipeline.
+
+Every engine returns a result shaped like openai-whisper's ``transcribe``
+output: ``{"text": ..., "language": ..., "segments": [...]}`` where each
+segment carries at least ``id``, ``start``, ``end`` and ``text``.
+"""
+import bisect
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+import multiprocessing
+
+import numpy as np
+
+from vad import SAMPLE_RATE, frame_energies, detect_speech, plan_chunks, load_audio_range
+
+DEFAULT_ENGINE = os.getenv("TRANSCRIPTION_ENGINE", "openai-whisper")
+DEFAULT_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+# "auto" uses a CUDA GPU when one is available, "cpu" or "cuda" force one
+TRANSCRIPTION_DEVICE = os.getenv("TRANSCRIPTION_DEVICE", "auto").lower()
+
+# Keys of the per-job options that configure an engine itself
+ENGINE_OPTION_KEYS = ('engine', 'model_size', 'threads', 'beam_size', 'compute_type')
+
+# Loaded models are shared between jobs: loading is slow and the weights are
+# read-only once loaded.
+_model_cache = {}
+_model_cache_lock = threading.Lock()
+
+
+def _get_cached_model(key, loader):
+    with _model_cache_lock:
+        if key not in _model_cache:
+            _model_cache[key] = loader()
+        return _model_cache[key]
+
+
+class TranscriptionEngine:
+    """Base class for transcription backends"""
+    name = None
+
+    def __init__(self, model_size=DEFAULT_MODEL_SIZE, threads=None, beam_size=None, compute_type=None):
+        self.model_size = model_size
+        self.threads = threads
+        self.beam_size = beam_size
+        self.compute_type = compute_type
+        self.model = None
+
+    def load(self):
+        """Load (or fetch from cache) the model for this engine"""
+        if self.model is None:
+            self.model = self._load_model()
+        return self.model
+
+    def transcribe(self, audio, should_stop=None):
+        """Transcribe a media file path or a 16 kHz mono float32 sample array.
+
+        ``should_stop`` is polled where the engine allows it; when it returns
+        True, transcription stops early with the segments decoded so far.
+        """
+        raise NotImplementedError
+
+    def _load_model(self):
+        raise NotImplementedError
+
+
+class OpenAIWhisperEngine(TranscriptionEngine):
+    """Reference openai-whisper backend (PyTorch, FP16 on GPU, FP32 on CPU)"""
+    name = "openai-whisper"
+
+    def _load_model(self):
+        import whisper
+        import torch
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        # None lets whisper pick CUDA when it is available
+        device = None if TRANSCRIPTION_DEVICE == "auto" else TRANSCRIPTION_DEVICE
+        key = (self.name, self.model_size, device)
+        return _get_cached_model(key, lambda: whisper.load_model(self.model_size, device=device))
+
+    def transcribe(self, audio, should_stop=None):
+        model = self.load()
+        # openai-whisper decodes in one call, there is nowhere to poll should_stop
+        options = {"fp16": model.device.type == "cuda"}
+        if self.beam_size:
+            options["beam_size"] = self.beam_size
+        return model.transcribe(audio, **options)
+
+
+class FasterWhisperEngine(TranscriptionEngine):
+    """faster-whisper backend (CTranslate2, int8 quantized by default)"""
+    name = "faster-whisper"
+
+    def _load_model(self):
+        import ctranslate2
+        from faster_whisper import WhisperModel
+
+        device = TRANSCRIPTION_DEVICE
+        if device == "auto":
+            device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        # int8 weights with FP16 activations on GPU, plain int8 on CPU
+        compute_type = self.compute_type or ("int8_float16" if device == "cuda" else "int8")
+        threads = self.threads or 0
+        key = (self.name, self.model_size, device, compute_type, threads)
+        return _get_cached_model(
+            key,
+            lambda: WhisperModel(self.model_size, device=device, compute_type=compute_type, cpu_threads=threads)
+        )
+
+    def transcribe(self, audio, should_stop=None):
+        segments, info = self.load().transcribe(audio, beam_size=self.beam_size or 5)
+
+        result_segments = []
+        # Segments are decoded lazily, so stopping here skips the rest of the audio
+        for segment in segments:
+            if should_stop and should_stop():
+                break
+            result_segments.append({
+                'id': segment.id,
+                'seek': segment.seek,
+                'start': segment.start,
+                'end': segment.end,
+                'text': segment.text,
+                'tokens': list(segment.tokens),
+                'temperature': segment.temperature,
+                'avg_logprob': segment.avg_logprob,
+                'compression_ratio': segment.compression_ratio,
+                'no_speech_prob': segment.no_speech_prob,
+            })
+
+        return {
+            'text': "".join(seg['text'] for seg in result_segments),
+            'segments': result_segments,
+            'language': info.language,
+        }
+
+
+ENGINES = {
+    OpenAIWhisperEngine.name: OpenAIWhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+
+def create_engine(engine=None, model_size=None, threads=None, beam_size=None, compute_type=None):
+    """Build a transcription engine from per-job options"""
+    engine = engine or DEFAULT_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown transcription engine: {engine}. Available: {', '.join(ENGINES)}")
+
+    return ENGINES[engine](
+        model_size=model_size or DEFAULT_MODEL_SIZE,
+        threads=threads,
+        beam_size=beam_size,
+        compute_type=compute_type,
+    )
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Each pool worker keeps its own engine (and model) for its whole lifetime
+_worker_engine = None
+
+
+def _init_chunk_worker(engine_options):
+    global _worker_engine
+    _worker_engine = create_engine(**engine_options)
+    _worker_engine.load()
+
+
+def _source_time(regions, offsets, t, is_end=False):
+    """Map a time in a chunk's joined clip back to a time in the original media"""
+    # An end exactly where a region starts in the clip still belongs to the region before
+    idx = max((bisect.bisect_left if is_end else bisect.bisect_right)(offsets, t) - 1, 0)
+    start, end = regions[idx]
+    return min(start + t - offsets[idx], end)
+
+
+def _transcribe_chunk(media_path, regions):
+    """Worker: transcribe one chunk, returns the CPU seconds used and its segments"""
+    # A worker runs one chunk at a time, so its process CPU time (all threads) is this chunk's
+    cpu_start = time.process_time()
+    # The chunk's regions are transcribed as one clip, without the silence between them
+    clips = [load_audio_range(media_path, start, end - start) for start, end in regions]
+    offsets = [0.0]
+    for clip in clips[:-1]:
+        offsets.append(offsets[-1] + len(clip) / SAMPLE_RATE)
+    result = _worker_engine.transcribe(np.concatenate(clips))
+    return time.process_time() - cpu_start, [
+        {**seg, 'start': _source_time(regions, offsets, seg['start']),
+         'end': _source_time(regions, offsets, seg['end'], is_end=True)}
+        for seg in result['segments']
+    ]
+
+
+def transcribe_with_vad(media_path, engine_options, workers=None, max_chunk=30.0, should_stop=None, report_cpu=None):
+    """Transcribe only the speech regions of ``media_path`` in parallel.
+
+    Voice activity detection finds the speech regions, which are packed into
+    chunks of at most ``max_chunk`` seconds of speech and transcribed across a
+    process pool. Workers decode their own chunk's regions from the source
+    file, so peak memory is bounded by the chunk size rather than the input
+    length. Segment timestamps are mapped back to positions in the original
+    media.
+
+    When ``should_stop`` returns True, chunks that have not started are
+    cancelled and this returns without waiting for the running ones.
+    ``report_cpu`` is called with the CPU seconds of each finished chunk.
+    """
+    energies = frame_energies(media_path)
+    chunks = plan_chunks(detect_speech(energies), max_chunk=max_chunk)
+    if not chunks:
+        return {'text': '', 'segments': [], 'language': None}
+
+    cores = available_cores()
+    workers = max(1, min(workers or cores, len(chunks)))
+    worker_options = dict(engine_options)
+    if not worker_options.get('threads'):
+        worker_options['threads'] = max(1, cores // workers)
+
+    print(f"[VAD] {len(chunks)} speech chunks, {sum(e - s for chunk in chunks for s, e in chunk):.0f}s of "
+          f"{len(energies) * 0.03:.0f}s audio, {workers} workers")
+
+    segments = []
+    # Not a with block: leaving one waits for the running chunks, even after a cancel
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_chunk_worker,
+        initargs=(worker_options,),
+    )
+    finished = False
+    try:
+        futures = [pool.submit(_transcribe_chunk, media_path, regions) for regions in chunks]
+        for future in futures:
+            while should_stop and not future.done():
+                if should_stop():
+                    return {'text': '', 'segments': [], 'language': None}
+                wait([future], timeout=1)
+            cpu, chunk_segments = future.result()
+            if report_cpu:
+                report_cpu(cpu)
+            segments.extend(chunk_segments)
+        finished = True
+    finally:
+        # Stopped or failed: drop the queued chunks and leave the running ones to finish on their own
+        pool.shutdown(wait=finished, cancel_futures=not finished)
+
+    for idx, seg in enumerate(segments):
+        seg['id'] = idx
+
+    return {
+        'text': "".join(seg['text'] for seg in segments),
+        'segments': segments,
+        'language': None,
+    }
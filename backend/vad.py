@@ -0,0 +1,131 @@
+"""Audio decoding and energy-based voice activity detection.
+
+Audio is streamed out of ffmpeg as 16 kHz mono PCM and reduced to one energy
+value per frame, so memory stays proportional to the number of frames rather
+than the number of samples, even for multi-hour inputs.
+"""
+import math
+import subprocess
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def _ffmpeg_pcm_command(path, start=None, duration=None):
+    cmd = ['ffmpeg', '-nostdin', '-loglevel', 'error']
+    if start:
+        cmd += ['-ss', f'{start:.3f}']
+    cmd += ['-i', path]
+    if duration:
+        cmd += ['-t', f'{duration:.3f}']
+    cmd += ['-vn', '-f', 's16le', '-ac', '1', '-ar', str(SAMPLE_RATE), '-']
+    return cmd
+
+
+def load_audio_range(path, start, duration):
+    """Decode [start, start + duration) seconds of audio as float32 samples"""
+    output = subprocess.run(
+        _ffmpeg_pcm_command(path, start, duration),
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+    ).stdout
+    return np.frombuffer(output, np.int16).astype(np.float32) / 32768.0
+
+
+def frame_energies(path, frame_ms=30, frames_per_read=2000):
+    """Return the RMS energy (dB) of every ``frame_ms`` frame of the audio track"""
+    frame_samples = SAMPLE_RATE * frame_ms // 1000
+    read_size = frame_samples * frames_per_read * 2  # int16 samples
+
+    process = subprocess.Popen(_ffmpeg_pcm_command(path), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    energies = []
+    leftover = b''
+    try:
+        while True:
+            chunk = process.stdout.read(read_size)
+            if not chunk:
+                break
+            data = leftover + chunk
+            usable = len(data) - len(data) % (frame_samples * 2)
+            leftover = data[usable:]
+            if not usable:
+                continue
+
+            samples = np.frombuffer(data[:usable], np.int16).astype(np.float32) / 32768.0
+            frames = samples.reshape(-1, frame_samples)
+            rms = np.sqrt(np.mean(frames ** 2, axis=1))
+            energies.append(20 * np.log10(np.maximum(rms, 1e-10)))
+    finally:
+        process.stdout.close()
+        process.wait()
+
+    if not energies:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(energies).astype(np.float32)
+
+
+def detect_speech(energies, frame_ms=30, margin_db=12.0, min_speech=0.25, min_silence=0.5, pad=0.2):
+    """Turn per-frame energies into a list of (start, end) speech regions in seconds.
+
+    The threshold adapts to the recording: anything ``margin_db`` above the
+    noise floor (10th percentile energy) counts as speech.
+    """
+    if len(energies) == 0:
+        return []
+
+    frame_seconds = frame_ms / 1000
+    threshold = np.percentile(energies, 10) + margin_db
+    voiced = energies > threshold
+
+    regions = []
+    start = None
+    for idx, is_voiced in enumerate(voiced):
+        if is_voiced and start is None:
+            start = idx
+        elif not is_voiced and start is not None:
+            regions.append([start * frame_seconds, idx * frame_seconds])
+            start = None
+    if start is not None:
+        regions.append([start * frame_seconds, len(voiced) * frame_seconds])
+
+    # Bridge short pauses, then drop blips that are too short to be speech
+    merged = []
+    for region in regions:
+        if merged and region[0] - merged[-1][1] < min_silence:
+            merged[-1][1] = region[1]
+        else:
+            merged.append(region)
+
+    total = len(voiced) * frame_seconds
+    return [
+        (max(0.0, s - pad), min(total, e + pad))
+        for s, e in merged
+        if e - s >= min_speech
+    ]
+
+
+def plan_chunks(regions, max_chunk=30.0):
+    """Pack speech regions into transcription chunks of at most ``max_chunk`` seconds of speech.
+
+    Each chunk is a list of (start, end) regions that are transcribed as one
+    clip with the silence between them left out. Regions are packed greedily
+    in order, however far apart they are.
+    """
+    chunks = []
+    length = 0.0
+    for start, end in regions:
+        # Split regions that are longer than a chunk into equal pieces, each a chunk of its own
+        pieces = math.ceil((end - start) / max_chunk)
+        if pieces > 1:
+            size = (end - start) / pieces
+            chunks.extend([(start + idx * size, start + (idx + 1) * size)] for idx in range(pieces))
+            length = max_chunk
+            continue
+
+        if chunks and length + end - start <= max_chunk:
+            chunks[-1].append((start, end))
+            length += end - start
+        else:
+            chunks.append([(start, end)])
+            length = end - start
+    return chunks
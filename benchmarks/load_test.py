@@ -0,0 +1,271 @@
+"""Load test for the FastAPI backend under rising concurrency.
+
+Simulated clients follow the same flow as the Streamlit frontend: submit via
+``/process``, poll ``/status``, fetch ``/tutorial-data`` and step images, and
+request ``/download-pdf``. The real pipeline is replaced by a fake processor
+with tunable CPU and sleep cost, so the test measures the HTTP layer and its
+interaction with running jobs rather than Whisper or OpenAI.
+
+Usage:
+    python benchmarks/load_test.py --concurrency 1,10,50,100 --duration 30 \\
+        --mix submit=0.2,viewer=0.7,pdf=0.1 --cpu-cost 2 --sleep-cost 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCH_DIR, "..", "backend")
+
+FAKE_STAGES = ('downloading', 'loading_model', 'transcribing', 'extracting_frames',
+               'structuring_tutorial', 'matching_frames')
+
+
+def make_frame_jpeg(width=1280, height=720):
+    """A noisy test frame, so /image serves realistically sized JPEGs"""
+    import cv2
+    import numpy as np
+
+    frame = np.random.default_rng(0).integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
+    return cv2.imencode('.jpg', frame)[1].tobytes()
+
+
+def install_fake_pipeline(app, cpu_cost, sleep_cost, steps, pdf_cost):
+    """Replace the video pipeline (and wkhtmltopdf) with tunable fakes"""
+
+    def burn_cpu(seconds):
+        end = time.process_time() + seconds
+        while time.process_time() < end:
+            sum(i * i for i in range(1000))
+
+    frame_jpeg = make_frame_jpeg()
+
+    def fake_process_video_task(youtube_url, job_id, *args, **kwargs):
+        app.metrics.JOBS_QUEUED.dec()
+        job_dir = f"jobs/{job_id}"
+        os.makedirs(f"{job_dir}/frames", exist_ok=True)
+        os.makedirs(f"{job_dir}/output", exist_ok=True)
+
+        for idx, stage in enumerate(FAKE_STAGES):
+            app.processing_status[job_id] = {"status": stage, "progress": idx * 15}
+            burn_cpu(cpu_cost / len(FAKE_STAGES))
+            time.sleep(sleep_cost / len(FAKE_STAGES))
+
+        tutorial_steps = []
+        for number in range(1, steps + 1):
+            frame_path = f"{job_dir}/frames/frame_{number * 10:.2f}.jpg"
+            with open(frame_path, 'wb') as f:
+                f.write(frame_jpeg)
+            tutorial_steps.append({
+                "step_number": number, "title": f"Step {number}", "explanation": "Fake step.",
+                "frame": frame_path, "timestamp": number * 10.0,
+            })
+        html_path = f"{job_dir}/output/tutorial.html"
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write("<html><body>fake</body></html>")
+
+        app.processing_status[job_id] = {
+            "status": "completed",
+            "progress": 100,
+            "html_path": html_path,
+            "tutorial_data": {"title": "Fake", "introduction": "Fake tutorial.", "steps": tutorial_steps},
+            "job_dir": job_dir,
+        }
+
+    def fake_pdf_from_string(html, path, *args, **kwargs):
+        burn_cpu(pdf_cost)
+        with open(path, 'wb') as f:
+            f.write(b"%PDF-1.4\n%fake\n" + html.encode('utf-8')[:1024])
+
+    app.process_video_task = fake_process_video_task
+    # The backend imports pdfkit when rendering, so patch the module itself
+    import pdfkit
+    pdfkit.from_string = fake_pdf_from_string
+
+
+def start_backend(args):
+    """Run the backend with the fake pipeline in a background thread"""
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    os.chdir(workdir)
+    os.environ.setdefault("OPENAI_API_KEY", "load-test")
+    # The submitted video IDs are made up, so there is nothing to probe
+    os.environ["ADMISSION_CHECK"] = "0"
+    sys.path.insert(0, BACKEND_DIR)
+
+    import uvicorn
+    import app
+
+    install_fake_pipeline(app, args.cpu_cost, args.sleep_cost, args.steps, args.pdf_cost)
+    config = uvicorn.Config(app.app, host="127.0.0.1", port=args.port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{args.port}"
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def request(self, client, method, endpoint, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except Exception:
+            response, ok = None, False
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if not ok:
+            self.errors[endpoint] += 1
+        return response if ok else None
+
+
+class LoadTest:
+    def __init__(self, base_url, args):
+        self.base_url = base_url
+        self.args = args
+        self.completed_jobs = []
+
+    async def fetch_tutorial(self, client, recorder, job_id):
+        response = await recorder.request(client, "GET", "/tutorial-data", f"{self.base_url}/tutorial-data/{job_id}")
+        if response is None:
+            return
+        for step in response.json()["steps"]:
+            filename = os.path.basename(step["frame"])
+            await recorder.request(client, "GET", "/image", f"{self.base_url}/image/{job_id}/{filename}")
+
+    async def submitter(self, client, recorder, deadline):
+        """Submit a video, poll until done, then view it like the frontend does"""
+        response = await recorder.request(
+            client, "POST", "/process", f"{self.base_url}/process",
+            json={"youtube_url": f"https://www.youtube.com/watch?v={uuid.uuid4().hex[:11]}"}
+        )
+        if response is None:
+            return
+        job_id = response.json()["job_id"]
+
+        while time.monotonic() < deadline:
+            status = await recorder.request(client, "GET", "/status", f"{self.base_url}/status/{job_id}")
+            if status is not None and status.json()["status"] == "completed":
+                self.completed_jobs.append(job_id)
+                await self.fetch_tutorial(client, recorder, job_id)
+                return
+            await asyncio.sleep(self.args.poll_interval)
+
+    async def viewer(self, client, recorder, deadline):
+        """Re-open an existing tutorial"""
+        if not self.completed_jobs:
+            await asyncio.sleep(self.args.poll_interval)
+            return
+        job_id = random.choice(self.completed_jobs)
+        await recorder.request(client, "GET", "/status", f"{self.base_url}/status/{job_id}")
+        await self.fetch_tutorial(client, recorder, job_id)
+
+    async def pdf(self, client, recorder, deadline):
+        """Download the PDF of an existing tutorial"""
+        if not self.completed_jobs:
+            await asyncio.sleep(self.args.poll_interval)
+            return
+        job_id = random.choice(self.completed_jobs)
+        await recorder.request(client, "GET", "/download-pdf", f"{self.base_url}/download-pdf/{job_id}")
+
+    async def client_loop(self, client, recorder, deadline, behaviors, weights):
+        while time.monotonic() < deadline:
+            behavior = random.choices(behaviors, weights)[0]
+            await getattr(self, behavior)(client, recorder, deadline)
+            await asyncio.sleep(random.uniform(0, self.args.think_time))
+
+    async def run_level(self, concurrency, mix):
+        import httpx
+
+        recorder = Recorder()
+        behaviors, weights = zip(*mix.items())
+        deadline = time.monotonic() + self.args.duration
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(timeout=self.args.timeout, limits=limits) as client:
+            await asyncio.gather(*[
+                self.client_loop(client, recorder, deadline, behaviors, weights)
+                for _ in range(concurrency)
+            ])
+        return recorder
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(concurrency, recorder):
+    endpoints = {}
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        endpoints[endpoint] = {
+            "requests": len(latencies),
+            "errors": recorder.errors[endpoint],
+            "error_rate": recorder.errors[endpoint] / len(latencies),
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+    return {"concurrency": concurrency, "endpoints": endpoints}
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, weight = item.split('=')
+        if name not in ('submitter', 'submit', 'viewer', 'pdf'):
+            raise argparse.ArgumentTypeError(f"Unknown client type: {name}")
+        mix['submitter' if name == 'submit' else name] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the backend API")
+    parser.add_argument("--url", help="Test an already running backend instead of starting one with the fake pipeline")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", default="1,5,10,25,50", help="Comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per concurrency level")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("submit=0.2,viewer=0.7,pdf=0.1"))
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Status poll interval (frontend uses 2s)")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Max random pause between client actions")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--cpu-cost", type=float, default=1.0, help="CPU seconds burned by each fake job")
+    parser.add_argument("--sleep-cost", type=float, default=5.0, help="Seconds each fake job sleeps")
+    parser.add_argument("--pdf-cost", type=float, default=0.2, help="CPU seconds burned by each fake PDF")
+    parser.add_argument("--steps", type=int, default=8, help="Steps per fake tutorial")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    base_url = args.url or start_backend(args)
+    test = LoadTest(base_url, args)
+
+    results = []
+    for level in [int(c) for c in args.concurrency.split(',')]:
+        print(f"Running {level} concurrent clients for {args.duration:.0f}s...")
+        summary = summarize(level, asyncio.run(test.run_level(level, args.mix)))
+        results.append(summary)
+
+        print(f"  {'endpoint':<16} {'reqs':>6} {'err %':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for endpoint, stats in summary["endpoints"].items():
+            print(f"  {endpoint:<16} {stats['requests']:>6} {stats['error_rate']:>6.1%} "
+                  f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Answers ``POST /v1/chat/completions`` the way the pipeline expects: a tutorial
+JSON object for structuring requests (``response_format`` json_object) and a
+frame number for frame-selection requests. Latency and failures are
+configurable so benchmarks can model a slow or flaky upstream.
+
+Usage:
+    python benchmarks/mock_openai.py --port 8100 --latency 0.8 --jitter 0.2 --error-rate 0.05
+
+then point the backend at it:
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=mock python backend/app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockConfig:
+    def __init__(self, latency=0.5, jitter=0.1, error_rate=0.0, error_status=500, steps=6, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.steps = steps
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+
+def _estimate_tokens(messages):
+    """Roughly 4 characters per token; images count as a fixed 85 tokens"""
+    tokens = 0
+    for message in messages:
+        content = message.get('content')
+        if isinstance(content, str):
+            tokens += len(content) // 4
+            continue
+        for part in content or []:
+            tokens += 85 if part.get('type') == 'image_url' else len(part.get('text', '')) // 4
+    return tokens
+
+
+def _tutorial_json(steps):
+    return json.dumps({
+        "title": "Benchmark Tutorial",
+        "introduction": "A generated tutorial used for offline benchmarking.",
+        "steps": [
+            {"step_number": idx, "title": f"Step {idx}", "explanation": f"Explanation for step {idx}."}
+            for idx in range(1, steps + 1)
+        ],
+    })
+
+
+def make_handler(config):
+    class MockOpenAIHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+
+            with config.lock:
+                config.requests += 1
+                delay = max(0.0, config.random.gauss(config.latency, config.jitter))
+                fail = config.random.random() < config.error_rate
+                if fail:
+                    config.errors += 1
+            time.sleep(delay)
+
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+            if fail:
+                self._send_json(config.error_status, {"error": {"message": "Injected failure", "type": "server_error"}})
+                return
+
+            messages = request.get('messages', [])
+            if (request.get('response_format') or {}).get('type') == 'json_object':
+                content = _tutorial_json(config.steps)
+            else:
+                images = sum(
+                    1 for message in messages if isinstance(message.get('content'), list)
+                    for part in message['content'] if part.get('type') == 'image_url'
+                )
+                content = str(config.random.randint(1, max(1, images)))
+
+            prompt_tokens = _estimate_tokens(messages)
+            completion_tokens = max(1, len(content) // 4)
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get('model', 'gpt-4o-mini'),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            })
+
+    return MockOpenAIHandler
+
+
+def start_server(config, host='127.0.0.1', port=0):
+    """Start the mock server in a daemon thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Latency standard deviation in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--steps", type=int, default=6, help="Steps in generated tutorials")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.jitter, args.error_rate, args.error_status, args.steps, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    print(f"Mock OpenAI server on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
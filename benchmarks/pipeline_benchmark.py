@@ -0,0 +1,214 @@
+"""Offline end-to-end benchmark of ``process_video_task``.
+
+Runs the full pipeline (local "download", transcription, frame extraction,
+structuring, matching, HTML) on local fixture videos, with the OpenAI client
+pointed at the mock server from ``mock_openai.py``. Each video runs in a fresh
+subprocess so peak RSS and CPU time are measured per run.
+
+Usage:
+    # synthesize 1, 5 and 15 minute fixtures with ffmpeg
+    python benchmarks/pipeline_benchmark.py --generate 60,300,900 --output bench.json
+
+    # or use your own videos
+    python benchmarks/pipeline_benchmark.py --fixtures fixtures/ --latency 1.0 --error-rate 0.05
+
+    # compare against a previous run
+    python benchmarks/pipeline_benchmark.py --fixtures fixtures/ --baseline bench.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCH_DIR, "..", "backend")
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.webm', '.mov')
+
+
+def generate_fixture(path, seconds):
+    """Synthesize a test video (moving test pattern plus a tone) with ffmpeg"""
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'testsrc=duration={seconds}:size=1280x720:rate=25',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}',
+        '-c:v', 'libx264', '-preset', 'veryfast', '-c:a', 'aac', '-shortest', path,
+    ], check=True)
+
+
+def video_duration(path):
+    import cv2
+
+    video = cv2.VideoCapture(path)
+    duration = video.get(cv2.CAP_PROP_FRAME_COUNT) / (video.get(cv2.CAP_PROP_FPS) or 1)
+    video.release()
+    return duration
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, text=True).strip()
+    except Exception:
+        return None
+
+
+def run_one(video_path, transcription):
+    """Child process entry point: run one job and print its measurements as JSON"""
+    sys.path.insert(0, BACKEND_DIR)
+    import app
+    import metrics
+
+    job_id = str(uuid.uuid4())
+    video_url = f"file://{os.path.abspath(video_path)}"
+    options = app.VideoRequest(youtube_url=video_url, transcription=transcription, caption_policy="whisper")
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    app.metrics.JOBS_QUEUED.inc()
+    app.process_video_task(video_url, job_id, options)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    status = app.processing_status[job_id]
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    duration = video_duration(video_path)
+    print(json.dumps({
+        'video': os.path.basename(video_path),
+        'video_seconds': duration,
+        'status': status['status'],
+        'error': status.get('message'),
+        'wall': wall,
+        'cpu': cpu,
+        'children_cpu': child_usage.ru_utime + child_usage.ru_stime,
+        # ru_maxrss is KiB on Linux
+        'peak_rss_mb': self_usage.ru_maxrss / 1024,
+        'children_peak_rss_mb': child_usage.ru_maxrss / 1024,
+        'throughput': duration / wall if wall else None,
+        'steps': len(status.get('tutorial_data', {}).get('steps', [])),
+        'stages': metrics.get_job_timings(job_id),
+    }))
+
+
+def run_benchmark(videos, args):
+    from mock_openai import MockConfig, start_server
+
+    config = MockConfig(args.latency, args.jitter, args.error_rate, steps=args.steps, seed=args.seed)
+    server, base_url = start_server(config)
+
+    env = dict(os.environ)
+    env.update({
+        'OPENAI_BASE_URL': base_url,
+        'OPENAI_API_KEY': 'mock',
+        'ALLOW_LOCAL_FILES': '1',
+    })
+    transcription = json.dumps({k: v for k, v in {
+        'engine': args.engine, 'model_size': args.model_size, 'vad': args.vad,
+    }.items() if v is not None})
+
+    runs = []
+    try:
+        for video in videos:
+            for repeat in range(args.repeat):
+                print(f"Running {os.path.basename(video)} ({repeat + 1}/{args.repeat})...")
+                with tempfile.TemporaryDirectory() as workdir:
+                    # Jobs are written to ./jobs, so every run starts from a cold cache
+                    output = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), '--run-one', os.path.abspath(video),
+                         '--transcription', transcription],
+                        cwd=workdir, env=env, capture_output=True, text=True
+                    )
+                if output.returncode != 0:
+                    print(output.stderr)
+                    raise SystemExit(f"Benchmark run failed for {video}")
+                runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    finally:
+        server.shutdown()
+
+    return {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {
+            'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+            'engine': args.engine, 'model_size': args.model_size, 'vad': args.vad,
+        },
+        'llm_requests': config.requests,
+        'llm_errors': config.errors,
+        'runs': runs,
+    }
+
+
+def print_report(results, baseline=None):
+    baseline_runs = {run['video']: run for run in (baseline or {}).get('runs', [])}
+    print()
+    print(f"{'video':<24} {'length':>7} {'wall':>8} {'cpu':>8} {'rss MB':>8} {'x realtime':>10}  status")
+    for run in results['runs']:
+        line = (f"{run['video']:<24} {run['video_seconds']:>6.0f}s {run['wall']:>7.1f}s {run['cpu']:>7.1f}s "
+                f"{run['peak_rss_mb']:>8.0f} {run['throughput']:>10.2f}  {run['status']}")
+        previous = baseline_runs.get(run['video'])
+        if previous:
+            line += f"  ({(run['wall'] - previous['wall']) / previous['wall']:+.1%} wall vs {baseline.get('revision')})"
+        print(line)
+        for stage, timing in run['stages'].items():
+            print(f"    {stage:<20} wall {timing['wall']:>8.2f}s  cpu {timing['cpu']:>8.2f}s")
+    print(f"\nLLM requests: {results['llm_requests']} ({results['llm_errors']} injected errors)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument("--fixtures", help="Directory of local fixture videos")
+    parser.add_argument("--generate", help="Comma-separated fixture lengths in seconds to synthesize with ffmpeg")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mock OpenAI mean latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine", default=None)
+    parser.add_argument("--model-size", default=None)
+    parser.add_argument("--vad", action="store_true", default=None)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--transcription", default="{}", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args.run_one, json.loads(args.transcription))
+        return
+
+    videos = []
+    fixture_dir = None
+    if args.generate:
+        fixture_dir = tempfile.mkdtemp(prefix="bench-fixtures-")
+        for seconds in args.generate.split(','):
+            path = os.path.join(fixture_dir, f"fixture_{int(seconds)}s.mp4")
+            generate_fixture(path, int(seconds))
+            videos.append(path)
+    if args.fixtures:
+        videos += [
+            os.path.join(args.fixtures, name) for name in sorted(os.listdir(args.fixtures))
+            if name.lower().endswith(VIDEO_EXTENSIONS)
+        ]
+    if not videos:
+        parser.error("No fixture videos: pass --fixtures and/or --generate")
+
+    results = run_benchmark(videos, args)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
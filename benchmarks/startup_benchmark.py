@@ -0,0 +1,166 @@
+"""Startup benchmark and import-time budget for the FastAPI backend.
+
+Measures, each in a fresh interpreter:
+
+- how long ``import app`` takes, and whether it pulled in any of the heavy
+  pipeline dependencies (torch, whisper, cv2, yt_dlp, pdfkit, openai), which
+  must only be imported by the code paths that use them
+- how long after launching uvicorn ``/health/live`` and ``/health/ready``
+  first answer 200
+
+Exits with status 1 when the median import time is over ``--import-budget``
+or a heavy module is imported at load time, so it can gate CI.
+
+Usage:
+    python benchmarks/startup_benchmark.py --repeat 5 --import-budget 1.5
+    python benchmarks/startup_benchmark.py --output startup.json --baseline previous.json
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCH_DIR, "..", "backend")
+HEAVY_MODULES = ('torch', 'whisper', 'faster_whisper', 'cv2', 'yt_dlp', 'pdfkit', 'openai')
+
+IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app
+print(json.dumps({{
+    'import': time.perf_counter() - start,
+    'heavy': [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def backend_env():
+    env = dict(os.environ)
+    env.setdefault('OPENAI_API_KEY', 'startup-benchmark')
+    env['PYTHONPATH'] = os.path.abspath(BACKEND_DIR)
+    return env
+
+
+def measure_import(workdir):
+    output = subprocess.run([sys.executable, '-c', IMPORT_PROBE], cwd=workdir, env=backend_env(),
+                            capture_output=True, text=True)
+    if output.returncode != 0:
+        print(output.stderr)
+        raise SystemExit("import app failed")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def measure_startup(workdir, timeout):
+    """Seconds from launching uvicorn until liveness and readiness succeed"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    launched = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+        cwd=workdir, env=backend_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = launched + timeout
+        live = wait_for(f"{base_url}/health/live", deadline)
+        ready = wait_for(f"{base_url}/health/ready", deadline)
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        'live': live - launched if live else None,
+        'ready': ready - launched if ready else None,
+    }
+
+
+def run_benchmark(args):
+    imports, startups = [], []
+    # An empty jobs directory, so restoring jobs does not skew the timings
+    with tempfile.TemporaryDirectory() as workdir:
+        for repeat in range(args.repeat):
+            print(f"Run {repeat + 1}/{args.repeat}...")
+            imports.append(measure_import(workdir))
+            startups.append(measure_startup(workdir, args.timeout))
+
+    def median(values):
+        values = [value for value in values if value is not None]
+        return statistics.median(values) if values else None
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'import': median(run['import'] for run in imports),
+        'heavy_modules': sorted({name for run in imports for name in run['heavy']}),
+        'live': median(run['live'] for run in startups),
+        'ready': median(run['ready'] for run in startups),
+        'runs': [{**imported, **started} for imported, started in zip(imports, startups)],
+    }
+
+
+def print_report(results, baseline=None):
+    print()
+    for key, label in (('import', 'import app'), ('live', 'live after'), ('ready', 'ready after')):
+        value = results[key]
+        line = f"{label:<12} {value:>7.3f}s" if value is not None else f"{label:<12}  timeout"
+        if baseline and baseline.get(key) and value is not None:
+            line += f"  ({(value - baseline[key]) / baseline[key]:+.1%} vs baseline)"
+        print(line)
+    print(f"heavy modules imported at load: {', '.join(results['heavy_modules']) or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API startup benchmark and import-time budget")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--import-budget", type=float, default=1.5, help="Maximum median seconds for import app")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the health endpoints")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+    failures = []
+    if results['import'] > args.import_budget:
+        failures.append(f"import app took {results['import']:.3f}s (budget {args.import_budget}s)")
+    if results['heavy_modules']:
+        failures.append(f"heavy modules imported at load: {', '.join(results['heavy_modules'])}")
+    if failures:
+        raise SystemExit("Startup budget exceeded: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Compare transcription engines on a fixed local audio corpus.
+
+The corpus directory holds audio files next to reference transcripts with the
+same stem (``lesson1.wav`` + ``lesson1.txt``). For every engine configuration
+the script reports the real-time factor (processing time / audio duration,
+lower is faster) and the word error rate against the references.
+
+Usage:
+    python benchmarks/transcription_benchmark.py corpus/ \\
+        --engine openai-whisper:base \\
+        --engine faster-whisper:base:int8 \\
+        --threads 4 --beam-size 5 --output results.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from transcription import create_engine
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.flac', '.ogg', '.mp4', '.webm')
+
+
+def load_corpus(corpus_dir):
+    """Return (audio_path, reference_text) pairs for every file with a reference"""
+    corpus = []
+    for name in sorted(os.listdir(corpus_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in AUDIO_EXTENSIONS:
+            continue
+        reference_path = os.path.join(corpus_dir, f"{stem}.txt")
+        if not os.path.exists(reference_path):
+            print(f"Skipping {name}: no reference transcript")
+            continue
+        with open(reference_path, 'r', encoding='utf-8') as f:
+            corpus.append((os.path.join(corpus_dir, name), f.read()))
+    return corpus
+
+
+def audio_duration(path):
+    """Audio duration in seconds, via ffprobe"""
+    output = subprocess.check_output([
+        'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1', path
+    ])
+    return float(output.strip())
+
+
+def normalize_words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length"""
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def parse_engine_spec(spec):
+    """``engine[:model_size[:compute_type]]`` -> create_engine kwargs"""
+    parts = spec.split(':')
+    return {
+        'engine': parts[0],
+        'model_size': parts[1] if len(parts) > 1 else None,
+        'compute_type': parts[2] if len(parts) > 2 else None,
+    }
+
+
+def benchmark_engine(spec, corpus, threads, beam_size):
+    engine = create_engine(threads=threads, beam_size=beam_size, **parse_engine_spec(spec))
+
+    load_start = time.perf_counter()
+    engine.load()
+    load_time = time.perf_counter() - load_start
+
+    files = []
+    total_audio = 0.0
+    total_elapsed = 0.0
+    total_errors = 0.0
+    total_words = 0
+    for audio_path, reference in corpus:
+        duration = audio_duration(audio_path)
+        start = time.perf_counter()
+        result = engine.transcribe(audio_path)
+        elapsed = time.perf_counter() - start
+
+        hypothesis = " ".join(seg['text'] for seg in result['segments'])
+        wer = word_error_rate(reference, hypothesis)
+        words = len(normalize_words(reference))
+
+        files.append({
+            'file': os.path.basename(audio_path),
+            'duration': duration,
+            'elapsed': elapsed,
+            'rtf': elapsed / duration if duration else None,
+            'wer': wer,
+        })
+        total_audio += duration
+        total_elapsed += elapsed
+        total_errors += wer * words
+        total_words += words
+
+    return {
+        'engine': spec,
+        'threads': threads,
+        'beam_size': beam_size,
+        'load_time': load_time,
+        'audio_seconds': total_audio,
+        'elapsed': total_elapsed,
+        'rtf': total_elapsed / total_audio if total_audio else None,
+        'wer': total_errors / total_words if total_words else None,
+        'files': files,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcription engines (RTF and WER)")
+    parser.add_argument("corpus", help="Directory with audio files and matching .txt references")
+    parser.add_argument("--engine", action="append", dest="engines",
+                        help="engine[:model_size[:compute_type]], may be repeated")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--beam-size", type=int, default=None)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error(f"No audio files with reference transcripts in {args.corpus}")
+
+    engines = args.engines or ["openai-whisper:base", "faster-whisper:base:int8"]
+    results = []
+    for spec in engines:
+        print(f"Benchmarking {spec} on {len(corpus)} files...")
+        results.append(benchmark_engine(spec, corpus, args.threads, args.beam_size))
+
+    print()
+    print(f"{'engine':<32} {'load (s)':>9} {'RTF':>7} {'WER':>7}")
+    for r in results:
+        print(f"{r['engine']:<32} {r['load_time']:>9.2f} {r['rtf']:>7.3f} {r['wer']:>7.2%}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -139,6 +139,8 @@ if 'youtube_url' not in st.session_state:
     st.session_state.youtube_url = None
 if 'pdf_generated' not in st.session_state:
     st.session_state.pdf_generated = False
+if 'job_error' not in st.session_state:
+    st.session_state.job_error = None
 
 # Input section
 with st.container():
@@ -156,10 +158,21 @@ with st.container():
         st.write("")  # Spacing
         process_button = st.button("🚀 Convert to Tutorial")
 
+def cancel_job(job_id):
+    """Stop a job that is no longer wanted so it stops using the server's CPU and API budget"""
+    try:
+        requests.delete(f"{API_URL}/jobs/{job_id}", timeout=10)
+    except Exception:
+        pass
+
 # Process video
 if process_button and youtube_url:
+    # Starting a new conversion abandons the one still in progress
+    if st.session_state.job_id and st.session_state.tutorial_data is None:
+        cancel_job(st.session_state.job_id)
     st.session_state.youtube_url = youtube_url
     st.session_state.pdf_generated = False  # Reset PDF generation flag
+    st.session_state.job_error = None
     with st.spinner("Starting video processing..."):
         try:
             response = requests.post(
@@ -171,6 +184,7 @@ if process_button and youtube_url:
             if response.status_code == 200:
                 data = response.json()
                 st.session_state.job_id = data['job_id']
+                st.session_state.job_started_at = time.time()
                 st.success(f"✅ Processing started! Job ID: {data['job_id']}")
             else:
                 st.error(f"❌ Error: {response.text}")
@@ -181,83 +195,157 @@ if process_button and youtube_url:
         except Exception as e:
             st.error(f"❌ Unexpected error: {str(e)}")
 
+STATUS_MESSAGES = {
+    'queued': '⏳ Waiting for a free worker...',
+    'downloading': '📥 Downloading video...',
+    'loading_model': '🤖 Loading AI models...',
+    'transcribing': '🎤 Transcribing audio...',
+    'extracting_frames': '🎬 Extracting video frames...',
+    'structuring_tutorial': '📝 Structuring tutorial with GPT...',
+    'matching_frames': '🖼️ Matching frames to steps with AI...',
+    'completed': '✅ Tutorial ready!',
+    'cancelled': '⏹️ Cancelled',
+    'error': '❌ Error occurred'
+}
+PROCESSING_TIMEOUT = 600  # 10 minutes max
+
+def end_job(error=None):
+    """Stop following the current job and rerun the whole page to show the outcome"""
+    st.session_state.job_id = None
+    st.session_state.job_error = error
+    st.rerun()
+
+@st.fragment(run_every=2)
+def progress_view(job_id):
+    """Check the job once per run; Streamlit reruns only this fragment every 2 seconds,
+    so waiting for a job neither blocks the script nor re-renders the rest of the page"""
+    if time.time() - st.session_state.job_started_at > PROCESSING_TIMEOUT:
+        cancel_job(job_id)
+        end_job("Processing timeout - please try again with a shorter video")
+    
+    try:
+        response = requests.get(f"{API_URL}/status/{job_id}", timeout=10)
+    except requests.exceptions.Timeout:
+        st.warning("Status check timeout, retrying...")
+        return
+    except Exception as e:
+        end_job(f"Error checking status: {str(e)}")
+    
+    if response.status_code != 200:
+        end_job("Failed to get status")
+    
+    status_data = response.json()
+    status = status_data['status']
+    
+    if status == 'completed':
+        tutorial_response = requests.get(f"{API_URL}/tutorial-data/{job_id}", timeout=10)
+        if tutorial_response.status_code != 200:
+            end_job("Failed to fetch tutorial data")
+        st.session_state.tutorial_data = tutorial_response.json()
+        st.rerun()
+    elif status == 'cancelled':
+        end_job()
+    elif status == 'error':
+        end_job(f"Error: {status_data.get('message', 'Unknown error')}")
+    
+    st.progress(status_data.get('progress', 0) / 100)
+    message = STATUS_MESSAGES.get(status, status)
+    priority = status_data.get('priority')
+    if status == 'queued' and priority:
+        message += f" (position {priority['queue_position']} of {priority['queue_length']})"
+    st.info(message)
+
+if st.session_state.job_error:
+    st.error(st.session_state.job_error)
+
 # Show progress if job is active
 if st.session_state.job_id and st.session_state.tutorial_data is None:
-    progress_placeholder = st.empty()
-    status_placeholder = st.empty()
+    if st.button("⏹️ Cancel"):
+        cancel_job(st.session_state.job_id)
+        st.session_state.job_id = None
+        st.rerun()
     
-    # Poll for status
-    max_polls = 300  # 10 minutes max (300 * 2 seconds)
-    poll_count = 0
+    progress_view(st.session_state.job_id)
+
+STEPS_PER_PAGE = 10
+THUMBNAIL_WIDTH = 640
+
+@st.cache_data(show_spinner=False, max_entries=200)
+def fetch_image(job_id, filename, width=None):
+    """Image bytes from the API, scaled down to ``width`` pixels if given (None when unavailable)"""
+    params = {'width': width} if width else None
+    response = requests.get(f"{API_URL}/image/{job_id}/{filename}", params=params, timeout=30)
+    if response.status_code != 200:
+        return None
+    return response.content
+
+def turn_page(key, delta):
+    st.session_state[key] += delta
+
+@st.fragment
+def steps_view(job_id, steps, youtube_url):
+    """One page of steps at a time: only its thumbnails are fetched, full-size images
+    only when asked for, and paging reruns just this fragment"""
+    pages = max(1, -(-len(steps) // STEPS_PER_PAGE))
+    page_key = f"step_page_{job_id}"
+    if pages > 1:
+        st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=page_key)
+    page = st.session_state.get(page_key, 1)
+    first = (page - 1) * STEPS_PER_PAGE
+    page_steps = steps[first:first + STEPS_PER_PAGE]
+    if pages > 1:
+        st.caption(f"Steps {first + 1}–{first + len(page_steps)} of {len(steps)}")
     
-    while poll_count < max_polls:
-        try:
-            response = requests.get(
-                f"{API_URL}/status/{st.session_state.job_id}",
-                timeout=10
-            )
+    for step in page_steps:
+        with st.container():
+            # Step header
+            col1, col2 = st.columns([0.1, 0.9])
             
-            if response.status_code == 200:
-                status_data = response.json()
-                status = status_data['status']
-                progress = status_data.get('progress', 0)
-                
-                # Update progress bar
-                progress_placeholder.progress(progress / 100)
-                
-                # Update status message
-                status_messages = {
-                    'downloading': '📥 Downloading video...',
-                    'loading_model': '🤖 Loading AI models...',
-                    'transcribing': '🎤 Transcribing audio...',
-                    'extracting_frames': '🎬 Extracting video frames...',
-                    'structuring_tutorial': '📝 Structuring tutorial with GPT...',
-                    'matching_frames': '🖼️ Matching frames to steps with AI...',
-                    'completed': '✅ Tutorial ready!',
-                    'error': '❌ Error occurred'
-                }
-                
-                status_placeholder.info(status_messages.get(status, status))
-                
-                if status == 'completed':
-                    # Fetch tutorial data
-                    tutorial_response = requests.get(
-                        f"{API_URL}/tutorial-data/{st.session_state.job_id}",
-                        timeout=10
-                    )
-                    
-                    if tutorial_response.status_code == 200:
-                        st.session_state.tutorial_data = tutorial_response.json()
-                        progress_placeholder.empty()
-                        status_placeholder.empty()
-                        st.success("✅ Tutorial generated successfully!")
-                        st.rerun()
-                    else:
-                        st.error("Failed to fetch tutorial data")
-                    break
-                
-                elif status == 'error':
-                    st.error(f"Error: {status_data.get('message', 'Unknown error')}")
-                    st.session_state.job_id = None
-                    break
-                
-                time.sleep(2)  # Poll every 2 seconds
-                poll_count += 1
-            else:
-                st.error("Failed to get status")
-                break
-                
-        except requests.exceptions.Timeout:
-            st.warning("Status check timeout, retrying...")
-            poll_count += 1
-            time.sleep(2)
-        except Exception as e:
-            st.error(f"Error checking status: {str(e)}")
-            break
+            with col1:
+                st.markdown(f"""
+                <div class="step-number">{step['step_number']}</div>
+                """, unsafe_allow_html=True)
+            
+            with col2:
+                st.markdown(f"### {step['title']}")
+            
+            # Step explanation
+            st.markdown(f"""
+            <div class="content-box">
+                {step['explanation']}
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Step image - a thumbnail, or the full frame on demand
+            try:
+                filename = os.path.basename(step['frame'])
+                full_size = st.toggle("🔍 Full size", key=f"full_{job_id}_{step['step_number']}")
+                image = fetch_image(job_id, filename, None if full_size else THUMBNAIL_WIDTH)
+                caption = f"⏱️ Timestamp: {step['timestamp']:.2f}s"
+                if image is None:
+                    st.warning("⚠️ Image not available")
+                elif full_size:
+                    st.image(image, caption=caption, use_container_width=True)
+                else:
+                    st.image(image, caption=caption, width=THUMBNAIL_WIDTH)
+            except Exception as e:
+                st.error(f"❌ Error loading image: {str(e)}")
+            
+            # Video timestamp link
+            if youtube_url:
+                timestamp_url = f"{youtube_url}&t={int(step['timestamp'])}s"
+                st.markdown(f"[▶️ Jump to this step in video]({timestamp_url})")
+            
+            st.markdown("---")
     
-    if poll_count >= max_polls:
-        st.error("Processing timeout - please try again with a shorter video")
-        st.session_state.job_id = None
+    if pages > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("⬅️ Previous page", key=f"prev_{job_id}", disabled=page == 1,
+                      on_click=turn_page, args=(page_key, -1))
+        with col3:
+            st.button("Next page ➡️", key=f"next_{job_id}", disabled=page == pages,
+                      on_click=turn_page, args=(page_key, 1))
 
 # Display tutorial
 if st.session_state.tutorial_data:
@@ -331,50 +419,7 @@ if st.session_state.tutorial_data:
     # Steps
     st.markdown("### 📋 Tutorial Steps")
     
-    for step in tutorial['steps']:
-        with st.container():
-            # Step header
-            col1, col2 = st.columns([0.1, 0.9])
-            
-            with col1:
-                st.markdown(f"""
-                <div class="step-number">{step['step_number']}</div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown(f"### {step['title']}")
-            
-            # Step explanation
-            st.markdown(f"""
-            <div class="content-box">
-                {step['explanation']}
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Step image - Get from API endpoint
-            try:
-                filename = os.path.basename(step['frame'])
-                image_url = f"{API_URL}/image/{st.session_state.job_id}/{filename}"
-                
-                # Try to fetch and display the image
-                img_response = requests.get(image_url, timeout=10)
-                if img_response.status_code == 200:
-                    st.image(
-                        img_response.content,
-                        caption=f"⏱️ Timestamp: {step['timestamp']:.2f}s",
-                        use_column_width=True
-                    )
-                else:
-                    st.warning(f"⚠️ Image not available (Status: {img_response.status_code})")
-            except Exception as e:
-                st.error(f"❌ Error loading image: {str(e)}")
-            
-            # Video timestamp link
-            if st.session_state.youtube_url:
-                timestamp_url = f"{st.session_state.youtube_url}&t={int(step['timestamp'])}s"
-                st.markdown(f"[▶️ Jump to this step in video]({timestamp_url})")
-            
-            st.markdown("---")
+    steps_view(st.session_state.job_id, tutorial['steps'], st.session_state.youtube_url)
     
     # Reset button
     if st.button("🔄 Convert Another Video"):
@@ -0,0 +1,26 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import frames  # noqa: E402
+
+SHARD_SECONDS = 6
+
+
+def slow_shard(video_path, times, frames_dir, offset):
+    """Stands in for _extract_shard in the pool workers: a shard that takes a long time"""
+    time.sleep(SHARD_SECONDS)
+    return 0.0, []
+
+
+def test_cancel_returns_without_waiting_for_running_shards(monkeypatch):
+    monkeypatch.setattr(frames, "_extract_shard", slow_shard)
+    started = time.time()
+
+    result = frames.extract_frames_parallel("unused.mp4", [0.0, 1.0], "unused", workers=1,
+                                            should_stop=lambda: time.time() - started > 1)
+
+    assert result == []
+    assert time.time() - started < SHARD_SECONDS - 2
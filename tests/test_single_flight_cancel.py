@@ -0,0 +1,98 @@
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import app  # noqa: E402
+import metrics  # noqa: E402
+from checkpoints import Checkpoint  # noqa: E402
+from scheduler import JobScheduler  # noqa: E402
+from singleflight import SingleFlight  # noqa: E402
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+class FinishedProcessor:
+    """Stands in for the pipeline: the job completes as soon as it runs"""
+
+    def __init__(self, youtube_url, job_id, options):
+        self.job_id = job_id
+        self.job_dir = f"jobs/{job_id}"
+        self.checkpoint = Checkpoint(self.job_dir)
+        self.video_duration = None
+
+    def prepare(self):
+        pass
+
+    def extract_text_and_frames(self):
+        return {"title": "Tutorial", "introduction": "", "steps": []}
+
+    def generate_html(self, tutorial_data):
+        os.makedirs(f"{self.job_dir}/output", exist_ok=True)
+        return f"{self.job_dir}/output/tutorial.html"
+
+
+def finished(outcome):
+    return metrics.JOBS_FINISHED.labels(outcome)._value.get()
+
+
+@pytest.fixture(autouse=True)
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # No workers: submitted jobs stay queued until a test runs them
+    monkeypatch.setattr(app, "job_scheduler", JobScheduler(workers=0))
+    monkeypatch.setattr(app, "SINGLE_FLIGHT", True)
+    monkeypatch.setattr(app, "single_flight", SingleFlight())
+
+
+def submit_pair():
+    request = app.VideoRequest(youtube_url=URL)
+    leader = app.submit_job(request, 60, "client-a")
+    follower = app.submit_job(request, 60, "client-b")
+    assert app.single_flight.leader_of(follower) == leader
+    return request, leader, follower
+
+
+def test_cancelled_leader_with_followers_is_counted_once_when_it_completes(monkeypatch):
+    request, leader, follower = submit_pair()
+    before = {outcome: finished(outcome) for outcome in ("completed", "cancelled", "detached")}
+
+    assert app.cancel(leader) == "cancelled"
+    # Only the leader's submission is detached, the work goes on for the follower
+    assert app.job_status(leader)["status"] == "cancelled"
+    assert app.job_status(follower)["status"] == "queued"
+    assert app.job_scheduler.describe(leader) is not None
+    assert finished("detached") == before["detached"] + 1
+    assert finished("cancelled") == before["cancelled"]
+
+    # Cancelling it again is rejected ("already cancelled") and not counted again
+    response = TestClient(app.app).delete(f"/jobs/{leader}")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Job is already cancelled"
+    assert finished("detached") == before["detached"] + 1
+
+    monkeypatch.setattr(app, "YouTubeVideoProcessor", FinishedProcessor)
+    app.process_video_task(URL, leader, request)
+
+    assert app.job_status(follower)["status"] == "completed"
+    assert finished("completed") == before["completed"] + 1
+    assert finished("cancelled") == before["cancelled"]
+    assert finished("detached") == before["detached"] + 1
+
+
+def test_last_follower_leaving_cancels_the_detached_leader():
+    request, leader, follower = submit_pair()
+    before = {outcome: finished(outcome) for outcome in ("cancelled", "detached")}
+
+    assert app.cancel(leader) == "cancelled"
+    assert app.cancel(follower) == "cancelled"
+
+    # Nobody waits for the work any more: the job itself is cancelled, once
+    assert app.job_scheduler.describe(leader) is None
+    assert app.processing_status[leader]["status"] == "cancelled"
+    assert finished("cancelled") == before["cancelled"] + 1
+    assert finished("detached") == before["detached"] + 2
@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+# Same budget as benchmarks/startup_benchmark.py
+IMPORT_BUDGET = 1.5
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+seconds = time.perf_counter() - start
+heavy = app.PIPELINE_MODULES + ('torch', 'whisper', 'faster_whisper')
+print(json.dumps({'import': seconds, 'heavy': [name for name in heavy if name in sys.modules]}))
+"""
+
+
+def import_app(workdir):
+    """Import the API in a fresh interpreter, returns the seconds it took and the heavy modules it loaded"""
+    env = {**os.environ, 'PYTHONPATH': BACKEND_DIR}
+    env.setdefault('OPENAI_API_KEY', 'test')
+    output = subprocess.run([sys.executable, '-c', IMPORT_PROBE], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def test_importing_the_api_stays_within_budget_without_pipeline_modules(tmp_path):
+    # Best of three, so one cold disk cache does not fail the budget
+    runs = [import_app(tmp_path) for _ in range(3)]
+
+    assert all(run['heavy'] == [] for run in runs), runs
+    assert min(run['import'] for run in runs) < IMPORT_BUDGET, runs
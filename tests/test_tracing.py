@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import tracing  # noqa: E402
+
+JOB_ID = "0b6a1c52-3f1e-4c7a-9d55-1f0e2a6b7c88"
+
+
+@pytest.fixture(autouse=True)
+def job_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(f"jobs/{JOB_ID}")
+
+
+def test_finished_job_spans_are_read_from_the_file():
+    with tracing.job_span(JOB_ID):
+        with tracing.span("download"):
+            assert JOB_ID in tracing._traces
+
+    # Nothing of the job is open any more: its spans only live in trace.json
+    assert JOB_ID not in tracing._traces
+    assert [span['name'] for span in tracing.waterfall(JOB_ID)['spans']] == ["job", "download"]
+    assert JOB_ID not in tracing._traces
+
+    # A later span (a regeneration) is added to the saved ones
+    with tracing.span("regenerate", job_id=JOB_ID):
+        pass
+    assert JOB_ID not in tracing._traces
+    assert [span['name'] for span in tracing.waterfall(JOB_ID)['spans']] == ["job", "download", "regenerate"]
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import app  # noqa: E402
+from checkpoints import Checkpoint  # noqa: E402
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+TUTORIAL = {"title": "Tutorial", "introduction": "Intro", "steps": []}
+
+
+@pytest.fixture(autouse=True)
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app, "processing_status", {})
+
+
+def completed_job(job_id, **checkpoint):
+    app.processing_status[job_id] = {"status": "completed", "progress": 100, "tutorial_data": TUTORIAL}
+    if checkpoint:
+        Checkpoint(f"jobs/{job_id}").set_state("completed", **checkpoint)
+
+
+def test_tutorial_renders_from_a_checkpoint_without_a_saved_request():
+    # Jobs checkpointed before requests were saved only have the URL
+    completed_job("old-job", youtube_url=URL)
+    client = TestClient(app.app)
+
+    response = client.get("/tutorial/old-job")
+    assert response.status_code == 200
+    assert URL in response.text
+    assert client.get("/export/old-job").status_code == 200
+    # Rendering does not set up a processor's job directories
+    assert not os.path.exists("jobs/old-job/frames")
+
+
+def test_tutorial_without_a_video_url_is_a_conflict():
+    completed_job("no-checkpoint")
+
+    assert TestClient(app.app).get("/tutorial/no-checkpoint").status_code == 409
@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from transcription import _source_time  # noqa: E402
+from vad import plan_chunks  # noqa: E402
+
+
+def test_regions_are_packed_up_to_max_chunk_however_far_apart():
+    regions = [(0, 10), (100, 115), (500, 510), (600, 700)]
+
+    assert plan_chunks(regions, max_chunk=30) == [
+        [(0, 10), (100, 115)],
+        [(500, 510)],
+        # A region longer than a chunk is split and never shares a chunk
+        [(600, 625)], [(625, 650)], [(650, 675)], [(675, 700)],
+    ]
+
+
+def test_clip_times_map_back_to_the_original_media():
+    regions = [(10, 14), (60, 64), (200, 204)]
+    offsets = [0.0, 4.0, 8.0]
+
+    assert _source_time(regions, offsets, 1.5) == 11.5
+    assert _source_time(regions, offsets, 4.0) == 60
+    # An end at a region boundary belongs to the region before it
+    assert _source_time(regions, offsets, 4.0, is_end=True) == 14
+    assert _source_time(regions, offsets, 9.0, is_end=True) == 201